@@ -1,5 +1,6 @@
 from pathlib import Path
 import os
+import tempfile
 
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 
@@ -28,12 +29,15 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
+    "tracker.metrics.MetricsMiddleware",
+    "tracker.routers.ReplicaPinMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "tracker.profiling.ProfilerMiddleware",
 ]
 
 ROOT_URLCONF = "ap_osrs_tracker.urls"
@@ -54,7 +58,39 @@ TEMPLATES = [
     }
 ]
 
+DATABASE_ROUTERS = ["tracker.routers.ReplicaRouter"]
+
 WSGI_APPLICATION = "ap_osrs_tracker.wsgi.application"
+ASGI_APPLICATION = "ap_osrs_tracker.asgi.application"
+
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.environ.get("CACHE_LOCATION", "ap-osrs-tracker"),
+    }
+}
+
+TRACKER_CACHE_TIMEOUT = int(os.environ.get("TRACKER_CACHE_TIMEOUT", "300"))
+TRACKER_FRAGMENT_TIMEOUT = int(os.environ.get("TRACKER_FRAGMENT_TIMEOUT", "3600"))
+TRACKER_STATS_TIMEOUT = int(os.environ.get("TRACKER_STATS_TIMEOUT", "3600"))
+TRACKER_METRICS_ENABLED = os.environ.get("TRACKER_METRICS_ENABLED", "True").lower() in {"true", "1", "yes"}
+TRACKER_METRICS_DIR = os.environ.get("TRACKER_METRICS_DIR", os.path.join(tempfile.gettempdir(), "ap-osrs-tracker-metrics"))
+TRACKER_METRICS_FLUSH_SECONDS = float(os.environ.get("TRACKER_METRICS_FLUSH_SECONDS", "5"))
+TRACKER_METRICS_TOKEN = os.environ.get("TRACKER_METRICS_TOKEN", "")
+TRACKER_PROFILE_DIR = os.environ.get("TRACKER_PROFILE_DIR", os.path.join(tempfile.gettempdir(), "ap-osrs-tracker-profiles"))
+TRACKER_PROFILE_TOKEN = os.environ.get("TRACKER_PROFILE_TOKEN", "")
+TRACKER_ASYNC_VIEWS = os.environ.get("TRACKER_ASYNC_VIEWS", "False").lower() in {"true", "1", "yes"}
+TRACKER_ASYNC_PARALLEL_READS = {"true": True, "false": False}.get(
+    os.environ.get("TRACKER_ASYNC_PARALLEL_READS", "auto").lower()
+)
+TRACKER_ARCHIVE_AFTER_DAYS = int(os.environ.get("TRACKER_ARCHIVE_AFTER_DAYS", "365"))
+TRACKER_TASK_MAX_ATTEMPTS = int(os.environ.get("TRACKER_TASK_MAX_ATTEMPTS", "3"))
+TRACKER_TASK_RETRY_SECONDS = float(os.environ.get("TRACKER_TASK_RETRY_SECONDS", "30"))
+TRACKER_TASK_TIMEOUT = int(os.environ.get("TRACKER_TASK_TIMEOUT", "600"))
+TRACKER_TASK_RETENTION_DAYS = int(os.environ.get("TRACKER_TASK_RETENTION_DAYS", "7"))
+TRACKER_WORKER_POLL_SECONDS = float(os.environ.get("TRACKER_WORKER_POLL_SECONDS", "2"))
+TRACKER_REPLICA_PIN_SECONDS = int(os.environ.get("TRACKER_REPLICA_PIN_SECONDS", "10"))
+TRACKER_ETAG_SALT = os.environ.get("TRACKER_ETAG_SALT", os.environ.get("RENDER_GIT_COMMIT", ""))[:12]
 
 AUTH_PASSWORD_VALIDATORS = [
     {
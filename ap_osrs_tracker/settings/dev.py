@@ -6,5 +6,14 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",  # noqa: F405
+        "OPTIONS": {"transaction_mode": "IMMEDIATE"},
+        "TEST": {"NAME": BASE_DIR / "test_db.sqlite3"},  # noqa: F405
     }
 }
+
+if os.environ.get("TRACKER_DEV_REPLICA", "False").lower() in {"true", "1", "yes"}:  # noqa: F405
+    DATABASES["replica"] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": BASE_DIR / "db.replica.sqlite3",  # noqa: F405
+        "TEST": {"MIRROR": "default"},
+    }
@@ -11,6 +11,14 @@ DATABASES = {
     )
 }
 
+if os.environ.get("DATABASE_REPLICA_URL"):
+    DATABASES["replica"] = dj_database_url.parse(
+        os.environ["DATABASE_REPLICA_URL"],
+        conn_max_age=600,
+        ssl_require=True,
+    )
+    DATABASES["replica"]["TEST"] = {"MIRROR": "default"}
+
 ALLOWED_HOSTS = [
     host.strip()
     for host in os.environ.get("ALLOWED_HOSTS", "").split(",")
@@ -0,0 +1,219 @@
+import json
+
+from django.http import JsonResponse
+from django.template.loader import render_to_string
+from django.views.decorators.http import require_GET, require_POST
+
+from .forms import LogFilterForm, StatsForm
+from .services import (
+    QUEST_SEARCH_LIMIT,
+    LedgerSnapshot,
+    earn_from_preset,
+    get_active_quest,
+    get_log_page,
+    get_quest_progress,
+    get_spend_options,
+    is_osrs_unlocked_today,
+    is_saturday_locked_now,
+    mark_quest_complete,
+    reorder_presets,
+    search_quests,
+    set_active_quest,
+    spend_ap,
+    sync_events,
+    take_snapshot,
+    undo_last_spend,
+)
+from .stats import get_stats
+from .views import get_default_user
+
+
+QUEST_SEARCH_MAX = 50
+
+
+def _quest_data(quest):
+    if quest is None:
+        return None
+    return {"id": quest.id, "name": quest.name, "status": quest.status, "minutes_logged": quest.minutes_logged}
+
+
+def _entry_data(request, entry):
+    return {
+        "id": entry.id,
+        "kind": entry.kind,
+        "label": entry.label,
+        "category": entry.category,
+        "ap": entry.ap,
+        "minutes": entry.minutes,
+        "timestamp": entry.timestamp.isoformat(),
+        "quest": _quest_data(entry.quest),
+        "html": render_to_string("tracker/_entry_card.html", {"entry": entry}, request=request),
+    }
+
+
+def _quest_panel(request, user, active_quest):
+    context = {"quests": search_quests(user), "active_quest": active_quest}
+    completed, total = get_quest_progress(user)
+    return {
+        "html": render_to_string("tracker/_quest_panel.html", context, request=request),
+        "completed": completed,
+        "total": total,
+    }
+
+
+def _state_response(snapshot, active_quest, **extra):
+    saturday_locked = is_saturday_locked_now(snapshot.user, snapshot=snapshot)
+    unlocked_today = is_osrs_unlocked_today(snapshot.user, snapshot=snapshot)
+    state = {
+        "ok": True,
+        "balance": snapshot.balance,
+        "today": snapshot.today,
+        "unlocked_today": unlocked_today and not saturday_locked,
+        "saturday_locked": saturday_locked,
+        "spend_options": get_spend_options(snapshot, active_quest),
+        "active_quest": _quest_data(active_quest),
+    }
+    state.update(extra)
+    return JsonResponse(state)
+
+
+def _error(exc):
+    return JsonResponse({"ok": False, "error": str(exc)}, status=400)
+
+
+@require_POST
+def earn_preset(request, preset_id):
+    user = get_default_user()
+    snapshot = LedgerSnapshot(user, load=False)
+    try:
+        entry = earn_from_preset(user, preset_id, snapshot=snapshot)
+    except ValueError as exc:
+        return _error(exc)
+    return _state_response(snapshot, get_active_quest(user), entry=_entry_data(request, entry), message="AP earned.")
+
+
+@require_POST
+def spend(request, cost):
+    user = get_default_user()
+    snapshot = LedgerSnapshot(user, load=False)
+    try:
+        entry = spend_ap(user, int(cost), snapshot=snapshot)
+    except ValueError as exc:
+        return _error(exc)
+    return _state_response(snapshot, entry.quest, entry=_entry_data(request, entry), message="Quest session logged.")
+
+
+@require_POST
+def undo_spend(request):
+    user = get_default_user()
+    snapshot = LedgerSnapshot(user, load=False)
+    try:
+        removed_id = undo_last_spend(user, snapshot=snapshot)
+    except ValueError as exc:
+        return _error(exc)
+    return _state_response(snapshot, get_active_quest(user), removed_entry_id=removed_id, message="Last spend entry removed.")
+
+
+@require_POST
+def set_active(request, quest_id):
+    user = get_default_user()
+    try:
+        quest = set_active_quest(user, quest_id)
+    except ValueError as exc:
+        return _error(exc)
+    return _state_response(
+        take_snapshot(user),
+        quest,
+        quest_panel=_quest_panel(request, user, quest),
+        message="Active quest updated.",
+    )
+
+
+@require_POST
+def complete_quest(request, quest_id):
+    user = get_default_user()
+    try:
+        entry = mark_quest_complete(user, quest_id)
+    except ValueError as exc:
+        return _error(exc)
+    active_quest = get_active_quest(user)
+    return _state_response(
+        take_snapshot(user),
+        active_quest,
+        entry=_entry_data(request, entry),
+        quest_panel=_quest_panel(request, user, active_quest),
+        message="Quest marked complete.",
+    )
+
+
+@require_POST
+def sync(request):
+    try:
+        payload = json.loads(request.body or b"{}")
+    except json.JSONDecodeError:
+        return _error(ValueError("Request body must be JSON."))
+    events = payload.get("events") if isinstance(payload, dict) else None
+    if not isinstance(events, list) or not all(isinstance(event, dict) for event in events):
+        return _error(ValueError("Expected a list of events."))
+    user = get_default_user()
+    snapshot = LedgerSnapshot(user, load=False)
+    try:
+        results, entries = sync_events(user, events, snapshot=snapshot)
+    except ValueError as exc:
+        return _error(exc)
+    return _state_response(
+        snapshot,
+        get_active_quest(user),
+        results=results,
+        entries=[_entry_data(request, entry) for entry in reversed(entries)],
+    )
+
+
+@require_GET
+def log(request):
+    user = get_default_user()
+    form = LogFilterForm(user, request.GET)
+    try:
+        entries, next_cursor = get_log_page(user, **form.filters())
+    except ValueError as exc:
+        return _error(exc)
+    return JsonResponse(
+        {
+            "ok": True,
+            "entries": [_entry_data(request, entry) for entry in entries],
+            "next_cursor": next_cursor,
+        }
+    )
+
+
+@require_GET
+def stats(request):
+    form = StatsForm(request.GET)
+    try:
+        report = get_stats(get_default_user(), **form.stats_range())
+    except ValueError as exc:
+        return _error(exc)
+    return JsonResponse({"ok": True, **report})
+
+
+@require_GET
+def quest_search(request):
+    try:
+        limit = min(int(request.GET.get("limit", QUEST_SEARCH_LIMIT)), QUEST_SEARCH_MAX)
+    except ValueError:
+        return _error(ValueError("limit must be a number."))
+    quests = search_quests(get_default_user(), request.GET.get("q", ""), limit=max(limit, 1))
+    return JsonResponse({"ok": True, "quests": [_quest_data(quest) for quest in quests]})
+
+
+@require_POST
+def preset_order(request):
+    try:
+        payload = json.loads(request.body or b"{}")
+        order = payload["order"]
+        changed = reorder_presets(get_default_user(), order)
+    except (json.JSONDecodeError, KeyError, TypeError):
+        return _error(ValueError("Expected a JSON body with an order list."))
+    except ValueError as exc:
+        return _error(exc)
+    return JsonResponse({"ok": True, "changed": changed})
@@ -0,0 +1,113 @@
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .ledger import bump_versions, daily_deltas, local_day, lock_user_ledger
+from .models import Entry, EntryArchive, MonthlySummary, UserLedger
+
+ARCHIVE_FIELDS = ("id", "timestamp", "kind", "label", "category", "ap", "quest_id", "minutes", "client_event_id")
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def next_month(day):
+    return (month_start(day) + timedelta(days=32)).replace(day=1)
+
+
+def month_boundary(day):
+    return timezone.make_aware(datetime.combine(day, time.min), timezone.get_current_timezone())
+
+
+def archive_horizon(days=None):
+    if days is None:
+        days = settings.TRACKER_ARCHIVE_AFTER_DAYS
+    return month_start(timezone.localdate() - timedelta(days=days))
+
+
+def summarize(entries):
+    summary = {"earned": 0, "spent": 0, "minutes": 0, "entry_count": 0, "days": {}, "categories": {}, "quests": {}}
+    for entry in entries:
+        summary["entry_count"] += 1
+        totals = summary["categories"].setdefault(entry.category, {"earned": 0, "spent": 0})
+        if entry.kind == Entry.Kind.EARN:
+            summary["earned"] += entry.ap
+            totals["earned"] += entry.ap
+        elif entry.kind == Entry.Kind.SPEND:
+            summary["spent"] += entry.ap
+            summary["minutes"] += entry.minutes
+            totals["spent"] += entry.ap
+            if entry.quest_id:
+                key = str(entry.quest_id)
+                summary["quests"][key] = summary["quests"].get(key, 0) + entry.minutes
+    summary["days"] = {day.isoformat(): delta for day, delta in sorted(daily_deltas(entries, 1).items())}
+    return summary
+
+
+def _add_summary(row, summary):
+    for field in ("earned", "spent", "minutes", "entry_count"):
+        setattr(row, field, getattr(row, field) + summary[field])
+    for day, delta in summary["days"].items():
+        merged = row.days.setdefault(day, dict.fromkeys(delta, 0))
+        for field, value in delta.items():
+            merged[field] += value
+    for category, totals in summary["categories"].items():
+        merged = row.categories.setdefault(category, {"earned": 0, "spent": 0})
+        merged["earned"] += totals["earned"]
+        merged["spent"] += totals["spent"]
+    for quest_id, minutes in summary["quests"].items():
+        row.quests[quest_id] = row.quests.get(quest_id, 0) + minutes
+
+
+def _archive_month(user, month):
+    with transaction.atomic():
+        lock_user_ledger(user)
+        rows = Entry.objects.filter(user=user, timestamp__lt=month_boundary(next_month(month)))
+        entries = list(rows.order_by("timestamp", "id"))
+        if not entries:
+            return 0
+        EntryArchive.objects.bulk_create(
+            [EntryArchive(user=user, **{field: getattr(entry, field) for field in ARCHIVE_FIELDS}) for entry in entries]
+        )
+        row, _ = MonthlySummary.objects.get_or_create(user=user, month=month)
+        _add_summary(row, summarize(entries))
+        row.save()
+        rows.delete()
+        marker = UserLedger.objects.filter(user=user).values_list("archived_before", flat=True).first()
+        if marker is None or marker < next_month(month):
+            UserLedger.objects.filter(user=user).update(archived_before=next_month(month))
+        bump_versions(user.pk, "entry_version", "history_version")
+        return len(entries)
+
+
+def archive_user(user, before):
+    archived = 0
+    months = 0
+    boundary = month_boundary(before)
+    while True:
+        oldest = Entry.objects.filter(user=user, timestamp__lt=boundary).order_by("timestamp").values("timestamp").first()
+        if oldest is None:
+            break
+        archived += _archive_month(user, month_start(local_day(oldest["timestamp"])))
+        months += 1
+    return archived, months
+
+
+def restore_user(user, since):
+    since = month_start(since)
+    with transaction.atomic():
+        lock_user_ledger(user)
+        rows = EntryArchive.objects.filter(user=user, timestamp__gte=month_boundary(since))
+        restored = Entry.objects.bulk_create(
+            [Entry(user=user, **{field: getattr(entry, field) for field in ARCHIVE_FIELDS}) for entry in rows.iterator()]
+        )
+        rows.delete()
+        MonthlySummary.objects.filter(user=user, month__gte=since).delete()
+        remaining = MonthlySummary.objects.filter(user=user).order_by("-month").values_list("month", flat=True).first()
+        UserLedger.objects.filter(user=user).update(archived_before=next_month(remaining) if remaining else None)
+        if restored:
+            bump_versions(user.pk, "entry_version", "history_version")
+    return len(restored)
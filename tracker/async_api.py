@@ -0,0 +1,9 @@
+from . import api
+from .async_views import async_action
+
+earn_preset = async_action(api.earn_preset)
+spend = async_action(api.spend)
+undo_spend = async_action(api.undo_spend)
+set_active = async_action(api.set_active)
+complete_quest = async_action(api.complete_quest)
+sync = async_action(api.sync)
@@ -0,0 +1,111 @@
+import asyncio
+from contextlib import ExitStack
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, connection, connections
+from django.shortcuts import render
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from django.views.decorators.cache import cache_control
+
+from . import views
+from .cache import aget_active_presets, get_active_presets
+from .progress import aget_progress, get_progress
+from .services import (
+    aget_active_quest,
+    aget_quest_progress,
+    atake_snapshot,
+    get_active_quest,
+    get_quest_progress,
+    recent_quests,
+    take_snapshot,
+)
+
+
+def parallel_reads():
+    if settings.TRACKER_ASYNC_PARALLEL_READS is not None:
+        return settings.TRACKER_ASYNC_PARALLEL_READS
+    return connection.vendor == "postgresql"
+
+
+def _isolated(func, wrappers):
+    @wraps(func)
+    def run(*args):
+        close_old_connections()
+        try:
+            with ExitStack() as stack:
+                for alias, installed in wrappers.items():
+                    for wrapper in installed:
+                        stack.enter_context(connections[alias].execute_wrapper(wrapper))
+                return func(*args)
+        finally:
+            close_old_connections()
+
+    return run
+
+
+def _execute_wrappers():
+    return {db.alias: list(db.execute_wrappers) for db in connections.all()}
+
+
+async def gather_reads(*calls):
+    wrappers = await sync_to_async(_execute_wrappers)()
+    tasks = [sync_to_async(_isolated(func, wrappers), thread_sensitive=False)(*args) for func, *args in calls]
+    return await asyncio.gather(*tasks)
+
+
+def _quest_list(user):
+    return list(recent_quests(user))
+
+
+async def dashboard_reads(user):
+    if parallel_reads():
+        return await gather_reads(
+            (get_active_quest, user),
+            (get_active_presets, user),
+            (take_snapshot, user),
+            (get_quest_progress, user),
+            (get_progress, user),
+            (_quest_list, user),
+        )
+    return (
+        await aget_active_quest(user),
+        await aget_active_presets(user),
+        await atake_snapshot(user),
+        await aget_quest_progress(user),
+        await aget_progress(user),
+        [quest async for quest in recent_quests(user)],
+    )
+
+
+def async_action(view):
+    @wraps(view)
+    async def action(request, *args, **kwargs):
+        return await sync_to_async(view)(request, *args, **kwargs)
+
+    return action
+
+
+@cache_control(private=True, no_cache=True)
+async def dashboard(request):
+    etag = await sync_to_async(views.dashboard_etag)(request)
+    etag = quote_etag(etag) if etag is not None else None
+    response = get_conditional_response(request, etag=etag)
+    if response is not None:
+        return response
+    user = await sync_to_async(views.get_default_user)()
+    active_quest, presets, snapshot, progress, streaks, quests = await dashboard_reads(user)
+    context = views.dashboard_context(user, active_quest, presets, snapshot, quests, progress, streaks)
+    response = await sync_to_async(render)(request, "tracker/dashboard.html", context)
+    if etag:
+        response.headers.setdefault("ETag", etag)
+    return response
+
+
+earn_preset = async_action(views.earn_preset)
+spend = async_action(views.spend)
+undo_spend = async_action(views.undo_spend)
+set_active = async_action(views.set_active)
+complete_quest = async_action(views.complete_quest)
@@ -0,0 +1,229 @@
+import math
+import random
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, reset_queries
+from django.db.models import OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from .ledger import rebuild_daily_ledger, rebuild_user_ledger
+from .models import DailyLedger, EarnPreset, Entry, Quest, UserSettings
+from .progress import WORKOUT_CATEGORY, apply_progress, rebuild_progress
+from .reports import compute_weekly_reports, get_weekly_reports
+from .services import SPEND_COSTS, balance, earn_from_preset, spend_ap, today_totals, undo_last_spend
+from .signals import DEFAULT_PRESETS
+
+OPERATIONS = ("dashboard", "earn_from_preset", "earn_first_of_day", "spend_ap", "undo_last_spend", "today_totals", "balance")
+QUERY_BUDGETS = {
+    "dashboard": 8,
+    "earn_from_preset": 9,
+    "earn_first_of_day": 9,
+    "spend_ap": 7,
+    "undo_last_spend": 7,
+    "today_totals": 1,
+    "balance": 1,
+}
+
+
+def generate_dataset(users=1, entries=1000, quests=20, presets=12, days=180, seed=0):
+    rng = random.Random(seed)
+    now = timezone.now()
+    User = get_user_model()
+    names = ["default", *[f"bench-{index:04d}" for index in range(1, users)]]
+    User.objects.bulk_create([User(username=name, password="!") for name in names])
+    created = list(User.objects.filter(username__in=names).order_by("id"))
+    UserSettings.objects.bulk_create(
+        [UserSettings(user=user, daily_earn_cap=10**6, unlock_net_ap_today=0) for user in created]
+    )
+
+    preset_rows = []
+    quest_rows = []
+    for user in created:
+        for index in range(presets):
+            label, category, ap, icon_key, _ = DEFAULT_PRESETS[index % len(DEFAULT_PRESETS)]
+            if index >= len(DEFAULT_PRESETS):
+                label = f"{label} #{index}"
+            preset_rows.append(
+                EarnPreset(user=user, label=label, category=category, ap=ap, icon_key=icon_key, sort_order=(index + 1) * 10)
+            )
+        for index in range(quests):
+            status = Quest.Status.ACTIVE if index == 0 else rng.choice([Quest.Status.NOT_STARTED, Quest.Status.COMPLETED])
+            quest_rows.append(Quest(user=user, name=f"Bench quest {index:03d}", status=status))
+    EarnPreset.objects.bulk_create(preset_rows)
+    Quest.objects.bulk_create(quest_rows)
+
+    preset_choices = {}
+    for preset in EarnPreset.objects.filter(user__in=created).only("user_id", "label", "category", "ap"):
+        preset_choices.setdefault(preset.user_id, []).append(preset)
+    quest_ids = {}
+    for quest_id, user_id in Quest.objects.filter(user__in=created).values_list("id", "user_id"):
+        quest_ids.setdefault(user_id, []).append(quest_id)
+
+    batch = []
+    for user in created:
+        batch.append(
+            Entry(user=user, timestamp=now, kind=Entry.Kind.EARN, label="Bench top-up", category=Entry.Category.BASE, ap=1000)
+        )
+        for _ in range(entries):
+            timestamp = now - timedelta(seconds=rng.randrange(days * 86400))
+            if rng.random() < 0.8:
+                preset = rng.choice(preset_choices[user.pk])
+                batch.append(
+                    Entry(user=user, timestamp=timestamp, kind=Entry.Kind.EARN, label=preset.label, category=preset.category, ap=preset.ap)
+                )
+            else:
+                cost = rng.choice(list(SPEND_COSTS))
+                batch.append(
+                    Entry(
+                        user=user,
+                        timestamp=timestamp,
+                        kind=Entry.Kind.SPEND,
+                        label="Quest session",
+                        category=Entry.Category.OSRS,
+                        ap=cost,
+                        quest_id=rng.choice(quest_ids[user.pk]),
+                        minutes=SPEND_COSTS[cost],
+                    )
+                )
+            if len(batch) >= 5000:
+                Entry.objects.bulk_create(batch)
+                batch = []
+    Entry.objects.bulk_create(batch)
+
+    minutes = Entry.objects.filter(quest=OuterRef("pk")).values("quest").annotate(total=Sum("minutes")).values("total")
+    Quest.objects.filter(user__in=created).update(minutes_logged=Coalesce(Subquery(minutes), 0))
+    for user in created:
+        rebuild_user_ledger(user)
+        rebuild_daily_ledger(user)
+        rebuild_progress(user)
+    return created
+
+
+@contextmanager
+def seeded_database(**dataset):
+    old_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        cache.clear()
+        generate_dataset(**dataset)
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def _measure(operation):
+    reset_queries()
+    with CaptureQueriesContext(connection) as context:
+        started = time.perf_counter()
+        operation()
+        elapsed = time.perf_counter() - started
+    return elapsed * 1000, len(context)
+
+
+def run_operations(user, client, iterations):
+    preset = EarnPreset.objects.filter(user=user, is_active=True).order_by("sort_order").first()
+
+    def dashboard():
+        response = client.get("/")
+        if response.status_code != 200:
+            raise RuntimeError(f"Dashboard returned {response.status_code}.")
+
+    def new_day():
+        DailyLedger.objects.filter(user=user, day=timezone.localdate()).delete()
+
+    operations = {
+        "earn_from_preset": lambda: earn_from_preset(user, preset.id),
+        "earn_first_of_day": (new_day, lambda: earn_from_preset(user, preset.id)),
+        "spend_ap": lambda: spend_ap(user, min(SPEND_COSTS)),
+        "undo_last_spend": lambda: undo_last_spend(user),
+        "today_totals": lambda: today_totals(user),
+        "balance": lambda: balance(user),
+        "dashboard": dashboard,
+    }
+    return _run(operations, iterations)
+
+
+def _run(operations, iterations):
+    timings = {name: [] for name in operations}
+    queries = dict.fromkeys(operations, 0)
+    for _ in range(iterations):
+        for name, operation in operations.items():
+            if isinstance(operation, tuple):
+                prepare, operation = operation
+                prepare()
+            elapsed, count = _measure(operation)
+            timings[name].append(elapsed)
+            queries[name] = max(queries[name], count)
+    return {
+        name: {
+            "p50_ms": round(percentile(timings[name], 0.5), 3),
+            "p95_ms": round(percentile(timings[name], 0.95), 3),
+            "mean_ms": round(sum(timings[name]) / len(timings[name]), 3),
+            "queries": queries[name],
+        }
+        for name in operations
+    }
+
+
+def run_progress(user, iterations):
+    user.usersettings = UserSettings.objects.get(user=user)
+    rebuild_progress(user)
+    earn = Entry(user=user, kind=Entry.Kind.EARN, label="Bench earn", category=Entry.Category.BASE, ap=5)
+    workout = Entry(user=user, kind=Entry.Kind.EARN, label="Bench workout", category=WORKOUT_CATEGORY, ap=5)
+    operations = {
+        "apply_earn": lambda: apply_progress(user, [earn]),
+        "apply_workout": lambda: apply_progress(user, [workout]),
+        "rebuild": lambda: rebuild_progress(user),
+    }
+    return _run(operations, iterations)
+
+
+def check_budgets(results):
+    failures = []
+    for size, operations in results.items():
+        for name, result in operations.items():
+            budget = QUERY_BUDGETS[name]
+            if result["queries"] > budget:
+                failures.append(f"{name} at {size} entries: {result['queries']} queries (budget {budget})")
+    return failures
+
+
+def compare_to_baseline(results, baseline, tolerance):
+    regressions = []
+    slowdowns = []
+    for size, operations in results.items():
+        for name, result in operations.items():
+            previous = baseline.get(size, {}).get(name)
+            if previous is None:
+                continue
+            if result["queries"] > previous["queries"]:
+                regressions.append(f"{name} at {size} entries: {previous['queries']} -> {result['queries']} queries")
+            if result["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+                slowdowns.append(f"{name} at {size} entries: p95 {previous['p95_ms']}ms -> {result['p95_ms']}ms")
+    return regressions, slowdowns
+
+
+def run_weekly_report(week):
+    user_ids = list(get_user_model().objects.values_list("pk", flat=True))
+    operations = {
+        "per_user": lambda: [compute_weekly_reports(week, [pk]) for pk in user_ids],
+        "grouped": lambda: compute_weekly_reports(week),
+        "generate": lambda: get_weekly_reports(week, refresh=True),
+        "stored": lambda: get_weekly_reports(week),
+    }
+    results = {}
+    for name, operation in operations.items():
+        elapsed, count = _measure(operation)
+        results[name] = {"ms": round(elapsed, 3), "queries": count}
+    return results
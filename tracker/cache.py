@@ -0,0 +1,99 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+
+from .metrics import record_fragment
+from .models import EarnPreset, UserSettings
+from .routers import primary_reads
+
+
+def _timeout():
+    return getattr(settings, "TRACKER_CACHE_TIMEOUT", 300)
+
+
+def user_key(username):
+    return f"tracker:user:{username}"
+
+
+def settings_key(user_id):
+    return f"tracker:settings:{user_id}"
+
+
+def presets_key(user_id):
+    return f"tracker:presets:{user_id}"
+
+
+def get_cached_user(username, loader):
+    user = cache.get(user_key(username))
+    if user is None:
+        user = loader()
+        cache.set(user_key(username), user, _timeout())
+    return user
+
+
+def _load_settings(user):
+    rows = UserSettings.objects.filter(user=user).annotate(version=F("user__userledger__settings_version"))
+    user_settings = rows.first()
+    if user_settings is None:
+        UserSettings.objects.get_or_create(user=user)
+        user_settings = rows.first()
+    return user_settings
+
+
+def get_user_settings(user, version=None):
+    user_settings = cache.get(settings_key(user.pk))
+    if user_settings is None or (version is not None and user_settings.version != version):
+        user_settings = _load_settings(user)
+        cache.set(settings_key(user.pk), user_settings, _timeout())
+    return user_settings
+
+
+def _active_presets(user):
+    return EarnPreset.objects.filter(user=user, is_active=True).order_by("sort_order", "label")
+
+
+def get_active_presets(user):
+    presets = cache.get(presets_key(user.pk))
+    if presets is None:
+        with primary_reads():
+            presets = list(_active_presets(user))
+        cache.set(presets_key(user.pk), presets, _timeout())
+    return presets
+
+
+async def aget_active_presets(user):
+    presets = await cache.aget(presets_key(user.pk))
+    if presets is None:
+        with primary_reads():
+            presets = [preset async for preset in _active_presets(user)]
+        await cache.aset(presets_key(user.pk), presets, _timeout())
+    return presets
+
+
+def invalidate_user(username):
+    cache.delete(user_key(username))
+
+
+def invalidate_settings(user_id):
+    cache.delete(settings_key(user_id))
+
+
+def invalidate_presets(user_id):
+    cache.delete(presets_key(user_id))
+
+
+def fragment_key(name, parts):
+    digest = hashlib.md5(":".join(parts).encode(), usedforsecurity=False).hexdigest()
+    return f"tracker:fragment:{name}:{digest}"
+
+
+def get_fragment(name, parts, render):
+    key = fragment_key(name, parts)
+    content = cache.get(key)
+    record_fragment(name, content is not None)
+    if content is None:
+        content = render()
+        cache.set(key, content, getattr(settings, "TRACKER_FRAGMENT_TIMEOUT", 3600))
+    return content
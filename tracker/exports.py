@@ -0,0 +1,77 @@
+import csv
+import heapq
+import json
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+
+from .models import Entry, EntryArchive
+
+EXPORT_FORMATS = ("csv", "ndjson")
+EXPORT_FIELDS = ("id", "timestamp", "kind", "category", "label", "ap", "minutes", "quest")
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_FLUSH_ROWS = 500
+CONTENT_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _rows(model, user, start, end, kind):
+    entries = model.objects.filter(user=user)
+    if start:
+        entries = entries.filter(timestamp__gte=_day_start(start))
+    if end:
+        entries = entries.filter(timestamp__lt=_day_start(end + timedelta(days=1)))
+    if kind:
+        entries = entries.filter(kind=kind)
+    rows = entries.order_by("timestamp", "id").values_list(
+        "id", "timestamp", "kind", "category", "label", "ap", "minutes", "quest__name"
+    )
+    return rows.iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+def export_rows(user, start=None, end=None, kind=None):
+    return heapq.merge(
+        _rows(EntryArchive, user, start, end, kind),
+        _rows(Entry, user, start, end, kind),
+        key=lambda row: (row[1], row[0]),
+    )
+
+
+def _batched(lines):
+    batch = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) >= EXPORT_FLUSH_ROWS:
+            yield "".join(batch)
+            batch = []
+    if batch:
+        yield "".join(batch)
+
+
+def _csv_lines(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        yield writer.writerow((*row[:1], row[1].isoformat(), *row[2:7], row[7] or ""))
+
+
+def _ndjson_lines(rows):
+    for row in rows:
+        record = dict(zip(EXPORT_FIELDS, row))
+        record["timestamp"] = record["timestamp"].isoformat()
+        yield json.dumps(record) + "\n"
+
+
+def stream_export(rows, export_format):
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {export_format}.")
+    lines = _csv_lines(rows) if export_format == "csv" else _ndjson_lines(rows)
+    return _batched(lines)
@@ -1,6 +1,12 @@
+from datetime import timedelta
+
 from django import forms
+from django.utils import timezone
 
-from .models import EarnPreset, Quest, UserSettings
+from .exports import EXPORT_FORMATS
+from .models import EarnPreset, Entry, Quest, UserSettings
+from .reports import last_complete_week
+from .stats import PERIODS
 
 
 class QuestForm(forms.ModelForm):
@@ -34,3 +40,65 @@ class SettingsForm(forms.ModelForm):
         widgets = {
             "saturday_unlock_time": forms.TimeInput(attrs={"type": "time"}),
         }
+
+
+class LogFilterForm(forms.Form):
+    kind = forms.ChoiceField(choices=[("", "All kinds"), *Entry.Kind.choices], required=False)
+    category = forms.ChoiceField(choices=[("", "All categories"), *Entry.Category.choices], required=False)
+    quest = forms.ModelChoiceField(queryset=Quest.objects.none(), required=False, empty_label="All quests")
+    cursor = forms.CharField(required=False, widget=forms.HiddenInput)
+
+    def __init__(self, user, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields["quest"].queryset = Quest.objects.filter(user=user).order_by("name")
+
+    def filters(self):
+        if not self.is_valid():
+            raise ValueError("Invalid log filters.")
+        data = self.cleaned_data
+        return {
+            "cursor": data["cursor"] or None,
+            "kind": data["kind"] or None,
+            "category": data["category"] or None,
+            "quest_id": data["quest"].pk if data["quest"] else None,
+        }
+
+
+class ExportForm(forms.Form):
+    format = forms.ChoiceField(choices=[(name, name.upper()) for name in EXPORT_FORMATS], initial="csv")
+    start = forms.DateField(required=False, widget=forms.DateInput(attrs={"type": "date"}))
+    end = forms.DateField(required=False, widget=forms.DateInput(attrs={"type": "date"}))
+    kind = forms.ChoiceField(choices=[("", "All kinds"), *Entry.Kind.choices], required=False)
+
+    def clean(self):
+        cleaned = super().clean()
+        if cleaned.get("start") and cleaned.get("end") and cleaned["start"] > cleaned["end"]:
+            raise forms.ValidationError("Start date must be before end date.")
+        return cleaned
+
+
+class ImportForm(forms.Form):
+    file = forms.FileField()
+    skip_invalid = forms.BooleanField(required=False, label="Skip invalid rows")
+
+
+class StatsForm(forms.Form):
+    start = forms.DateField(required=False, widget=forms.DateInput(attrs={"type": "date"}))
+    end = forms.DateField(required=False, widget=forms.DateInput(attrs={"type": "date"}))
+    period = forms.ChoiceField(choices=[(name, name.title()) for name in PERIODS], required=False)
+
+    def stats_range(self):
+        if not self.is_valid():
+            raise ValueError("Invalid stats range.")
+        end = self.cleaned_data["end"] or timezone.localdate()
+        start = self.cleaned_data["start"] or end - timedelta(days=29)
+        return {"start": start, "end": end, "period": self.cleaned_data["period"] or "day"}
+
+
+class WeeklyReportForm(forms.Form):
+    week = forms.DateField(required=False, widget=forms.DateInput(attrs={"type": "date"}))
+
+    def report_week(self):
+        if not self.is_valid():
+            raise ValueError("Invalid week.")
+        return self.cleaned_data["week"] or last_complete_week()
@@ -0,0 +1,169 @@
+import csv
+import time
+from dataclasses import dataclass, field
+
+from django.db import transaction
+from django.db.models import OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .ledger import bump_versions, lock_user_ledger, rebuild_daily_ledger, rebuild_user_ledger
+from .models import Entry, EntryArchive, Quest
+from .progress import rebuild_progress
+
+IMPORT_BATCH_SIZE = 1000
+REQUIRED_COLUMNS = {"timestamp", "kind", "label", "ap"}
+DEFAULT_CATEGORIES = {
+    Entry.Kind.EARN: Entry.Category.BASE,
+    Entry.Kind.SPEND: Entry.Category.OSRS,
+    Entry.Kind.QUEST_COMPLETE: Entry.Category.OSRS,
+}
+
+
+@dataclass
+class ImportResult:
+    rows: int = 0
+    created: int = 0
+    quests_created: int = 0
+    errors: list = field(default_factory=list)
+    seconds: float = 0.0
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+def _non_negative(row, column):
+    value = (row.get(column) or "0").strip()
+    try:
+        number = int(value)
+    except ValueError:
+        raise ValueError(f"{column} must be a whole number.")
+    if number < 0:
+        raise ValueError(f"{column} must not be negative.")
+    return number
+
+
+def parse_row(row):
+    timestamp = parse_datetime((row.get("timestamp") or "").strip())
+    if timestamp is None:
+        raise ValueError("Invalid timestamp.")
+    if timezone.is_naive(timestamp):
+        timestamp = timezone.make_aware(timestamp)
+    if timestamp > timezone.now():
+        raise ValueError("Timestamp is in the future.")
+    kind = (row.get("kind") or "").strip()
+    if kind not in Entry.Kind.values:
+        raise ValueError(f"Unknown kind {kind!r}.")
+    category = (row.get("category") or "").strip() or DEFAULT_CATEGORIES[kind]
+    if category not in Entry.Category.values:
+        raise ValueError(f"Unknown category {category!r}.")
+    label = (row.get("label") or "").strip()
+    if not label or len(label) > Entry._meta.get_field("label").max_length:
+        raise ValueError("Label must be 1-140 characters.")
+    quest = (row.get("quest") or "").strip()
+    if len(quest) > Quest._meta.get_field("name").max_length:
+        raise ValueError("Quest name is too long.")
+    if kind != Entry.Kind.EARN and not quest:
+        raise ValueError("Spend and quest_complete rows need a quest.")
+    return {
+        "timestamp": timestamp,
+        "kind": kind,
+        "category": category,
+        "label": label,
+        "ap": _non_negative(row, "ap"),
+        "minutes": _non_negative(row, "minutes"),
+        "quest": quest or None,
+    }
+
+
+def _resolve_quests(user, names, quests):
+    missing = names - quests.keys()
+    if not missing:
+        return 0
+    for quest in Quest.objects.filter(user=user, name__in=missing):
+        quests[quest.name] = quest
+    new = [Quest(user=user, name=name) for name in sorted(missing - quests.keys())]
+    Quest.objects.bulk_create(new)
+    if new and new[0].pk is None:
+        new = list(Quest.objects.filter(user=user, name__in=[quest.name for quest in new]))
+    for quest in new:
+        quests[quest.name] = quest
+    return len(new)
+
+
+def _write_batch(user, batch, quests, result):
+    result.quests_created += _resolve_quests(user, {row["quest"] for row in batch if row["quest"]}, quests)
+    entries = []
+    for row in batch:
+        name = row.pop("quest")
+        entries.append(Entry(user=user, quest=quests.get(name), **row))
+    Entry.objects.bulk_create(entries, batch_size=IMPORT_BATCH_SIZE)
+    result.created += len(entries)
+
+
+def _quest_minutes(model):
+    minutes = (
+        model.objects.filter(quest=OuterRef("pk"), kind=Entry.Kind.SPEND)
+        .values("quest")
+        .annotate(total=Sum("minutes"))
+        .values("total")
+    )
+    return Coalesce(Subquery(minutes), 0)
+
+
+def refresh_quest_minutes(ids, now=None):
+    return Quest.objects.filter(pk__in=ids).update(
+        minutes_logged=_quest_minutes(Entry) + _quest_minutes(EntryArchive),
+        updated_at=now or timezone.now(),
+    )
+
+
+def _refresh_quests(user, quests, completed):
+    if not quests:
+        return
+    now = timezone.now()
+    refresh_quest_minutes([quest.pk for quest in quests.values()], now)
+    if completed:
+        Quest.objects.filter(user=user, name__in=completed).update(status=Quest.Status.COMPLETED, updated_at=now)
+
+
+def import_entries(user, lines, skip_invalid=False):
+    started = time.perf_counter()
+    reader = csv.DictReader(lines)
+    missing = REQUIRED_COLUMNS - set(reader.fieldnames or ())
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(sorted(missing))}.")
+    result = ImportResult()
+    quests = {}
+    completed = set()
+    with transaction.atomic():
+        lock_user_ledger(user)
+        batch = []
+        for line_number, row in enumerate(reader, start=2):
+            result.rows += 1
+            try:
+                parsed = parse_row(row)
+            except ValueError as exc:
+                result.errors.append((line_number, str(exc)))
+                continue
+            if parsed["kind"] == Entry.Kind.QUEST_COMPLETE:
+                completed.add(parsed["quest"])
+            batch.append(parsed)
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                _write_batch(user, batch, quests, result)
+                batch = []
+        if result.errors and not skip_invalid:
+            line_number, message = result.errors[0]
+            raise ValueError(f"Line {line_number}: {message} ({len(result.errors)} invalid row(s), nothing imported.)")
+        if batch:
+            _write_batch(user, batch, quests, result)
+        _refresh_quests(user, quests, completed)
+        if result.created:
+            rebuild_user_ledger(user)
+            rebuild_daily_ledger(user)
+            rebuild_progress(user)
+            bump_versions(user.pk, "quest_version")
+    result.seconds = time.perf_counter() - started
+    return result
@@ -0,0 +1,275 @@
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Case, Count, F, Q, Subquery, Sum, When
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .models import DailyLedger, Entry, EntryArchive, MonthlySummary, UserLedger, WeeklyReport
+
+VERSION_FIELDS = ("entry_version", "quest_version", "preset_version", "settings_version", "history_version")
+UPSERT_VENDORS = ("sqlite", "postgresql")
+DAILY_FIELDS = ("earned", "spent", "net", "minutes", "earn_count", "spend_count", "entry_count")
+
+
+def _split_ap(entries):
+    earned = sum(entry.ap for entry in entries if entry.kind == Entry.Kind.EARN)
+    spent = sum(entry.ap for entry in entries if entry.kind == Entry.Kind.SPEND)
+    return earned, spent
+
+
+def _latest_entry(user, exclude_ids=()):
+    entries = Entry.objects.filter(user=user).exclude(id__in=exclude_ids)
+    latest = entries.order_by("-timestamp", "-id").values("id", "timestamp").first()
+    if latest is None:
+        latest = EntryArchive.objects.filter(user=user).order_by("-timestamp", "-id").values("id", "timestamp").first()
+    return latest
+
+
+def local_day(timestamp):
+    return timezone.localtime(timestamp, timezone.get_current_timezone()).date()
+
+
+def get_today_range(tz):
+    now = timezone.localtime(timezone.now(), tz)
+    start = datetime.combine(now.date(), time.min)
+    end = start + timedelta(days=1)
+    return timezone.make_aware(start, tz), timezone.make_aware(end, tz)
+
+
+def get_week_range(tz, monday_start=True):
+    now = timezone.localtime(timezone.now(), tz)
+    weekday = now.weekday() if monday_start else (now.weekday() + 1) % 7
+    start_date = now.date() - timedelta(days=weekday)
+    start = datetime.combine(start_date, time.min)
+    end = start + timedelta(days=7)
+    return timezone.make_aware(start, tz), timezone.make_aware(end, tz)
+
+
+def rebuild_user_ledger(user):
+    with transaction.atomic():
+        if not _lock_ledger_row(user):
+            UserLedger.objects.get_or_create(user=user)
+            _lock_ledger_row(user)
+        totals = Entry.objects.filter(user=user).aggregate(
+            earned=Sum("ap", filter=Q(kind=Entry.Kind.EARN), default=0),
+            spent=Sum("ap", filter=Q(kind=Entry.Kind.SPEND), default=0),
+        )
+        archived = MonthlySummary.objects.filter(user=user).aggregate(
+            earned=Sum("earned", default=0),
+            spent=Sum("spent", default=0),
+        )
+        latest = _latest_entry(user)
+        UserLedger.objects.filter(user=user).update(
+            earned=totals["earned"] + archived["earned"],
+            spent=totals["spent"] + archived["spent"],
+            last_entry_id=latest["id"] if latest else None,
+            last_entry_at=latest["timestamp"] if latest else None,
+            updated_at=timezone.now(),
+        )
+        bump_versions(user.pk, "entry_version", "history_version")
+        return UserLedger.objects.get(user=user)
+
+
+def get_user_ledger(user):
+    ledger = UserLedger.objects.filter(user=user).first()
+    if ledger is None:
+        ledger = rebuild_user_ledger(user)
+    return ledger
+
+
+def _lock_ledger_row(user):
+    rows = UserLedger.objects.filter(user=user)
+    if connection.vendor == "sqlite":
+        return rows.update(updated_at=timezone.now())
+    return rows.select_for_update().values_list("pk", flat=True).first()
+
+
+def writes_serialized():
+    return connection.vendor == "sqlite" and getattr(connection, "transaction_mode", None) == "IMMEDIATE"
+
+
+def lock_user_ledger(user):
+    if writes_serialized():
+        # BEGIN IMMEDIATE already holds the database write lock.
+        return
+    if not _lock_ledger_row(user):
+        rebuild_user_ledger(user)
+
+
+def bump_versions(user_id, *fields):
+    UserLedger.objects.filter(user_id=user_id).update(**{field: F(field) + 1 for field in fields})
+
+
+def _history_versions(entries):
+    today = timezone.localdate()
+    if any(local_day(entry.timestamp) < today for entry in entries):
+        return {"history_version": F("history_version") + 1}
+    return {}
+
+
+def _drop_weekly_reports(user, entries):
+    current = timezone.localdate()
+    current -= timedelta(days=current.weekday())
+    days = {local_day(entry.timestamp) for entry in entries}
+    weeks = {day - timedelta(days=day.weekday()) for day in days}
+    if any(week < current for week in weeks):
+        WeeklyReport.objects.filter(user=user, week__in=weeks).delete()
+
+
+def daily_deltas(entries, sign):
+    deltas = defaultdict(lambda: dict.fromkeys(DAILY_FIELDS, 0))
+    for entry in entries:
+        delta = deltas[local_day(entry.timestamp)]
+        delta["entry_count"] += sign
+        if entry.kind == Entry.Kind.EARN:
+            delta["earned"] += sign * entry.ap
+            delta["net"] += sign * entry.ap
+            delta["earn_count"] += sign
+        elif entry.kind == Entry.Kind.SPEND:
+            delta["spent"] += sign * entry.ap
+            delta["net"] -= sign * entry.ap
+            delta["minutes"] += sign * entry.minutes
+            delta["spend_count"] += sign
+    return deltas
+
+
+def _upsert_daily_sql(user, day, delta):
+    quote = connection.ops.quote_name
+    table = quote(DailyLedger._meta.db_table)
+    now = timezone.now()
+    values = {"user": user.pk, "day": day, **delta, "updated_at": now}
+    fields = [DailyLedger._meta.get_field(name) for name in values]
+    columns = ", ".join(quote(field.column) for field in fields)
+    increments = ", ".join(f"{quote(name)} = {table}.{quote(name)} + excluded.{quote(name)}" for name in delta)
+    sql = (
+        f"INSERT INTO {table} ({columns}) VALUES ({', '.join(['%s'] * len(fields))}) "
+        f"ON CONFLICT ({quote('user_id')}, {quote('day')}) DO UPDATE SET {increments}, "
+        f"{quote('updated_at')} = excluded.{quote('updated_at')}"
+    )
+    params = [field.get_db_prep_save(values[field.name], connection) for field in fields]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def _upsert_daily(user, day, delta):
+    changes = {field: F(field) + value for field, value in delta.items()}
+    rows = DailyLedger.objects.filter(user=user, day=day)
+    if rows.update(updated_at=timezone.now(), **changes):
+        return
+    try:
+        with transaction.atomic():
+            DailyLedger.objects.create(user=user, day=day, **delta)
+    except IntegrityError:
+        rows.update(updated_at=timezone.now(), **changes)
+
+
+def _apply_daily(user, entries, sign):
+    upsert = _upsert_daily_sql if sign > 0 and connection.vendor in UPSERT_VENDORS else _upsert_daily
+    for day, delta in daily_deltas(entries, sign).items():
+        upsert(user, day, delta)
+
+
+def record_entries(user, entries, versions=()):
+    if not entries:
+        return
+    earned, spent = _split_ap(entries)
+    latest = max(entries, key=lambda entry: (entry.timestamp, entry.id))
+    newer = Q(last_entry_at__gt=latest.timestamp)
+    UserLedger.objects.filter(user=user).update(
+        earned=F("earned") + earned,
+        spent=F("spent") + spent,
+        last_entry_id=Case(When(newer, then=F("last_entry_id")), default=latest.id),
+        last_entry_at=Case(When(newer, then=F("last_entry_at")), default=latest.timestamp),
+        entry_version=F("entry_version") + 1,
+        updated_at=timezone.now(),
+        **{field: F(field) + 1 for field in versions},
+        **_history_versions(entries),
+    )
+    _apply_daily(user, entries, 1)
+    _drop_weekly_reports(user, entries)
+
+
+def _latest_remaining(user, removed_ids, field):
+    ordering = ("-timestamp", "-id")
+    entries = Entry.objects.filter(user=user).exclude(id__in=removed_ids).order_by(*ordering).values(field)[:1]
+    archived = EntryArchive.objects.filter(user=user).order_by(*ordering).values(field)[:1]
+    return Coalesce(Subquery(entries), Subquery(archived))
+
+
+def unrecord_entries(user, entries, versions=()):
+    if not entries:
+        return
+    _apply_daily(user, entries, -1)
+    _drop_weekly_reports(user, entries)
+    earned, spent = _split_ap(entries)
+    removed_ids = {entry.id for entry in entries}
+    removed = Q(last_entry_id__in=removed_ids)
+    UserLedger.objects.filter(user=user).update(
+        earned=F("earned") - earned,
+        spent=F("spent") - spent,
+        last_entry_id=Case(When(removed, then=_latest_remaining(user, removed_ids, "id")), default=F("last_entry_id")),
+        last_entry_at=Case(
+            When(removed, then=_latest_remaining(user, removed_ids, "timestamp")), default=F("last_entry_at")
+        ),
+        entry_version=F("entry_version") + 1,
+        updated_at=timezone.now(),
+        **{field: F(field) + 1 for field in versions},
+        **_history_versions(entries),
+    )
+
+
+def daily_totals_from_entries(user):
+    rows = (
+        Entry.objects.filter(user=user)
+        .annotate(day=TruncDate("timestamp", tzinfo=timezone.get_current_timezone()))
+        .values("day")
+        .annotate(
+            earned=Sum("ap", filter=Q(kind=Entry.Kind.EARN), default=0),
+            spent=Sum("ap", filter=Q(kind=Entry.Kind.SPEND), default=0),
+            minutes=Sum("minutes", filter=Q(kind=Entry.Kind.SPEND), default=0),
+            earn_count=Count("id", filter=Q(kind=Entry.Kind.EARN)),
+            spend_count=Count("id", filter=Q(kind=Entry.Kind.SPEND)),
+            entry_count=Count("id"),
+        )
+        .order_by()
+    )
+    totals = {}
+    for row in rows:
+        day = row.pop("day")
+        row["net"] = row["earned"] - row["spent"]
+        totals[day] = row
+    for days in MonthlySummary.objects.filter(user=user).values_list("days", flat=True):
+        for day, values in days.items():
+            merged = totals.setdefault(parse_date(day), dict.fromkeys(DAILY_FIELDS, 0))
+            for field in DAILY_FIELDS:
+                merged[field] += values[field]
+    return totals
+
+
+def rebuild_daily_ledger(user):
+    with transaction.atomic():
+        lock_user_ledger(user)
+        totals = daily_totals_from_entries(user)
+        DailyLedger.objects.filter(user=user).delete()
+        WeeklyReport.objects.filter(user=user).delete()
+        DailyLedger.objects.bulk_create(
+            [DailyLedger(user=user, day=day, **values) for day, values in sorted(totals.items())]
+        )
+        bump_versions(user.pk, "entry_version", "history_version")
+    return len(totals)
+
+
+def check_daily_ledger(user):
+    expected = daily_totals_from_entries(user)
+    stored = {row.pop("day"): row for row in DailyLedger.objects.filter(user=user).values("day", *DAILY_FIELDS)}
+    empty = dict.fromkeys(DAILY_FIELDS, 0)
+    mismatches = []
+    for day in sorted(expected.keys() | stored.keys()):
+        want = expected.get(day, empty)
+        have = stored.get(day, empty)
+        if want != have:
+            mismatches.append((day, want, have))
+    return mismatches
@@ -0,0 +1,29 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from tracker.archive import archive_horizon, archive_user
+
+
+class Command(BaseCommand):
+    help = "Move entries older than the archive horizon into EntryArchive and per-month summaries."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", help="Only archive entries for this username.")
+        parser.add_argument("--days", type=int, help="Archive whole months older than this many days.")
+
+    def handle(self, *args, **options):
+        if options["days"] is not None and options["days"] < 0:
+            raise CommandError("--days must not be negative.")
+        users = get_user_model().objects.order_by("id")
+        if options["user"]:
+            users = users.filter(username=options["user"])
+            if not users.exists():
+                raise CommandError(f"User {options['user']!r} not found.")
+        before = archive_horizon(options["days"])
+        total = 0
+        for user in users.iterator():
+            archived, months = archive_user(user, before)
+            total += archived
+            if archived:
+                self.stdout.write(f"{user.username}: archived {archived} entries across {months} month(s)")
+        self.stdout.write(self.style.SUCCESS(f"Archived {total} entries before {before.isoformat()}."))
@@ -0,0 +1,24 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from tracker.ledger import rebuild_daily_ledger
+
+
+class Command(BaseCommand):
+    help = "Rebuild the DailyLedger rollup rows from the Entry log."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", help="Only backfill rollups for this username.")
+
+    def handle(self, *args, **options):
+        users = get_user_model().objects.order_by("id")
+        if options["user"]:
+            users = users.filter(username=options["user"])
+            if not users.exists():
+                raise CommandError(f"User {options['user']!r} not found.")
+        total_days = 0
+        for user in users.iterator():
+            days = rebuild_daily_ledger(user)
+            total_days += days
+            self.stdout.write(f"{user.username}: {days} day(s)")
+        self.stdout.write(self.style.SUCCESS(f"Backfilled {total_days} daily ledger row(s)."))
@@ -0,0 +1,90 @@
+import json
+import platform
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from django.utils import timezone
+
+from tracker.bench import check_budgets, compare_to_baseline, run_operations, seeded_database
+from tracker.views import get_default_user
+
+BENCH_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "tracker-bench"}}
+
+
+class Command(BaseCommand):
+    help = "Benchmark hot paths against seeded test databases and enforce per-operation query budgets."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", default="100,1000,10000", help="Comma-separated entries per user.")
+        parser.add_argument("--users", type=int, default=3)
+        parser.add_argument("--quests", type=int, default=20)
+        parser.add_argument("--presets", type=int, default=12)
+        parser.add_argument("--iterations", type=int, default=30)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--output", help="Write the JSON report to this file.")
+        parser.add_argument("--baseline", help="Compare against a previously written JSON report.")
+        parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed p95 slowdown vs baseline.")
+        parser.add_argument("--fail-on-slowdown", action="store_true", help="Treat p95 slowdowns as failures.")
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options["sizes"].split(",") if size]
+        except ValueError:
+            raise CommandError("--sizes must be a comma-separated list of integers.")
+        if options["iterations"] < 1 or options["users"] < 1:
+            raise CommandError("--iterations and --users must be at least 1.")
+
+        results = {}
+        setup_test_environment()
+        try:
+            with override_settings(CACHES=BENCH_CACHES):
+                for size in sizes:
+                    dataset = {
+                        "users": options["users"],
+                        "entries": size,
+                        "quests": options["quests"],
+                        "presets": options["presets"],
+                        "seed": options["seed"],
+                    }
+                    with seeded_database(**dataset):
+                        results[str(size)] = run_operations(get_default_user(), Client(), options["iterations"])
+                    self._print_size(size, results[str(size)])
+        finally:
+            teardown_test_environment()
+
+        report = {
+            "generated_at": timezone.now().isoformat(),
+            "database": connection.vendor,
+            "python": platform.python_version(),
+            "seed": options["seed"],
+            "users": options["users"],
+            "iterations": options["iterations"],
+            "results": results,
+        }
+        if options["output"]:
+            with open(options["output"], "w") as handle:
+                json.dump(report, handle, indent=2)
+            self.stdout.write(f"Report written to {options['output']}.")
+
+        failures = check_budgets(results)
+        if options["baseline"]:
+            with open(options["baseline"]) as handle:
+                baseline = json.load(handle)["results"]
+            regressions, slowdowns = compare_to_baseline(results, baseline, options["tolerance"])
+            failures += regressions
+            for line in slowdowns:
+                self.stdout.write(self.style.WARNING(f"slower: {line}"))
+            if options["fail_on_slowdown"]:
+                failures += slowdowns
+        if failures:
+            raise CommandError("Benchmark failed:\n" + "\n".join(failures))
+        self.stdout.write(self.style.SUCCESS("All operations within their query budgets."))
+
+    def _print_size(self, size, operations):
+        self.stdout.write(f"{size} entries per user")
+        for name, result in operations.items():
+            self.stdout.write(
+                f"  {name:<18} p50 {result['p50_ms']:>8.2f}ms  p95 {result['p95_ms']:>8.2f}ms  {result['queries']:>3} queries"
+            )
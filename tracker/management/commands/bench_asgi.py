@@ -0,0 +1,112 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from django.urls import include, path
+
+from tracker.bench import percentile, seeded_database
+from tracker.urls import build_urlpatterns
+
+from .bench import BENCH_CACHES
+
+
+class SyncURLConf:
+    urlpatterns = [path("", include(build_urlpatterns(False)))]
+
+
+class AsyncURLConf:
+    urlpatterns = [path("", include(build_urlpatterns(True)))]
+
+
+def _summary(samples, elapsed):
+    return {
+        "requests": len(samples),
+        "rps": len(samples) / elapsed,
+        "p50_ms": percentile(samples, 0.5),
+        "p95_ms": percentile(samples, 0.95),
+    }
+
+
+def _timed_get(client):
+    started = time.perf_counter()
+    response = client.get("/")
+    if response.status_code != 200:
+        raise CommandError(f"Dashboard returned {response.status_code}.")
+    return (time.perf_counter() - started) * 1000
+
+
+def run_wsgi(requests, concurrency):
+    clients = [Client() for _ in range(concurrency)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        samples = list(pool.map(_timed_get, (clients[i % concurrency] for i in range(requests))))
+    return _summary(samples, time.perf_counter() - started)
+
+
+async def run_asgi(requests, concurrency):
+    queue = asyncio.Queue()
+    for _ in range(requests):
+        queue.put_nowait(None)
+    samples = []
+
+    async def worker():
+        client = AsyncClient()
+        while not queue.empty():
+            queue.get_nowait()
+            started = time.perf_counter()
+            response = await client.get("/")
+            if response.status_code != 200:
+                raise CommandError(f"Dashboard returned {response.status_code}.")
+            samples.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return _summary(samples, time.perf_counter() - started)
+
+
+class Command(BaseCommand):
+    help = "Compare dashboard throughput of the sync (WSGI) and async (ASGI) views at several concurrency levels."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", default="1,4,16", help="Comma-separated concurrent clients.")
+        parser.add_argument("--requests", type=int, default=200, help="Requests per run.")
+        parser.add_argument("--entries", type=int, default=1000, help="Entries per user in the seeded database.")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--parallel-reads",
+            choices=["auto", "on", "off"],
+            default="auto",
+            help="Run the async dashboard's reads on separate connections.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            levels = [int(level) for level in options["concurrency"].split(",") if level]
+        except ValueError:
+            raise CommandError("--concurrency must be a comma-separated list of integers.")
+        if options["requests"] < 1 or not levels or min(levels) < 1:
+            raise CommandError("--requests and --concurrency must be at least 1.")
+        parallel = {"auto": None, "on": True, "off": False}[options["parallel_reads"]]
+
+        setup_test_environment()
+        try:
+            with override_settings(CACHES=BENCH_CACHES, TRACKER_ASYNC_PARALLEL_READS=parallel):
+                with seeded_database(entries=options["entries"], seed=options["seed"]):
+                    for level in levels:
+                        with override_settings(ROOT_URLCONF=SyncURLConf):
+                            wsgi = run_wsgi(options["requests"], level)
+                        with override_settings(ROOT_URLCONF=AsyncURLConf):
+                            asgi = asyncio.run(run_asgi(options["requests"], level))
+                        self._print_level(level, wsgi, asgi)
+        finally:
+            teardown_test_environment()
+
+    def _print_level(self, level, wsgi, asgi):
+        self.stdout.write(f"concurrency {level}")
+        for name, result in (("wsgi", wsgi), ("asgi", asgi)):
+            self.stdout.write(
+                f"  {name}  {result['rps']:>8.1f} req/s  p50 {result['p50_ms']:>8.2f}ms  p95 {result['p95_ms']:>8.2f}ms"
+            )
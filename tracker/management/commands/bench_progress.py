@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from tracker.bench import run_progress, seeded_database
+from tracker.views import get_default_user
+
+
+class Command(BaseCommand):
+    help = "Compare incremental streak/achievement updates against a full progress rebuild as history grows."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", default="100,1000,10000,50000", help="Comma-separated entries per user.")
+        parser.add_argument("--days", type=int, default=365, help="Spread seeded entries over this many days.")
+        parser.add_argument("--iterations", type=int, default=30)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options["sizes"].split(",") if size]
+        except ValueError:
+            raise CommandError("--sizes must be a comma-separated list of integers.")
+        if options["iterations"] < 1:
+            raise CommandError("--iterations must be at least 1.")
+
+        setup_test_environment()
+        try:
+            for size in sizes:
+                with seeded_database(users=1, entries=size, days=options["days"], seed=options["seed"]):
+                    results = run_progress(get_default_user(), options["iterations"])
+                self.stdout.write(f"{size} entries")
+                for name, result in results.items():
+                    self.stdout.write(
+                        f"  {name:<14} p50 {result['p50_ms']:>8.2f}ms  p95 {result['p95_ms']:>8.2f}ms"
+                        f"  {result['queries']:>3} queries"
+                    )
+        finally:
+            teardown_test_environment()
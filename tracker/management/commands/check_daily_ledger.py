@@ -0,0 +1,33 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from tracker.ledger import check_daily_ledger, rebuild_daily_ledger
+
+
+class Command(BaseCommand):
+    help = "Compare DailyLedger rollup rows against the raw Entry log."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", help="Only check rollups for this username.")
+        parser.add_argument("--fix", action="store_true", help="Rebuild rollups for users with mismatches.")
+
+    def handle(self, *args, **options):
+        users = get_user_model().objects.order_by("id")
+        if options["user"]:
+            users = users.filter(username=options["user"])
+            if not users.exists():
+                raise CommandError(f"User {options['user']!r} not found.")
+        broken = 0
+        for user in users.iterator():
+            mismatches = check_daily_ledger(user)
+            if not mismatches:
+                continue
+            broken += 1
+            for day, expected, stored in mismatches:
+                self.stdout.write(f"{user.username} {day}: expected {expected}, stored {stored}")
+            if options["fix"]:
+                rebuild_daily_ledger(user)
+                self.stdout.write(f"{user.username}: rebuilt")
+        if broken and not options["fix"]:
+            raise CommandError(f"{broken} user(s) have inconsistent daily ledgers.")
+        self.stdout.write(self.style.SUCCESS("Daily ledger check complete."))
@@ -0,0 +1,33 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from tracker.progress import check_progress, rebuild_progress
+
+
+class Command(BaseCommand):
+    help = "Compare incrementally maintained streak/achievement state against a full rebuild."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", help="Only check progress for this username.")
+        parser.add_argument("--fix", action="store_true", help="Rebuild progress for users with mismatches.")
+
+    def handle(self, *args, **options):
+        users = get_user_model().objects.order_by("id")
+        if options["user"]:
+            users = users.filter(username=options["user"])
+            if not users.exists():
+                raise CommandError(f"User {options['user']!r} not found.")
+        broken = 0
+        for user in users.iterator():
+            mismatches = check_progress(user)
+            if not mismatches:
+                continue
+            broken += 1
+            for field, expected, stored in mismatches:
+                self.stdout.write(f"{user.username} {field}: expected {expected}, stored {stored}")
+            if options["fix"]:
+                rebuild_progress(user)
+                self.stdout.write(f"{user.username}: rebuilt")
+        if broken and not options["fix"]:
+            raise CommandError(f"{broken} user(s) have inconsistent progress.")
+        self.stdout.write(self.style.SUCCESS("Progress check complete."))
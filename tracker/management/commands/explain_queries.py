@@ -0,0 +1,34 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from tracker.query_plans import FULL_SCAN_PATTERNS, explain_queries
+
+
+class Command(BaseCommand):
+    help = "EXPLAIN the service-layer ledger queries and fail if any plan falls back to a full table scan."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", default="default", help="Username to bind the queries to (default: default).")
+        parser.add_argument("--database", default="default", help="Database alias to explain against.")
+        parser.add_argument("--verbose-plans", action="store_true", help="Print every plan, not just failures.")
+
+    def handle(self, *args, **options):
+        vendor = connections[options["database"]].vendor
+        if vendor not in FULL_SCAN_PATTERNS:
+            raise CommandError(f"EXPLAIN checks are not implemented for {vendor}.")
+        user = get_user_model().objects.using(options["database"]).filter(username=options["user"]).first()
+        if user is None:
+            raise CommandError(f"User {options['user']!r} not found.")
+        failures = []
+        for name, plan, scans in explain_queries(user, using=options["database"]):
+            if scans:
+                failures.append(f"{name}: full scan of {', '.join(scans)}")
+                self.stdout.write(self.style.ERROR(f"{name}: FULL SCAN"))
+            else:
+                self.stdout.write(f"{name}: ok")
+            if scans or options["verbose_plans"]:
+                self.stdout.write("    " + plan.replace("\n", "\n    "))
+        if failures:
+            raise CommandError("Query plan regressions:\n" + "\n".join(failures))
+        self.stdout.write(self.style.SUCCESS(f"All service queries use indexes on {vendor}."))
@@ -0,0 +1,45 @@
+import sys
+import tracemalloc
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from tracker.exports import EXPORT_FORMATS, export_rows, stream_export
+from tracker.models import Entry
+
+
+class Command(BaseCommand):
+    help = "Stream the Entry ledger as CSV or NDJSON without loading it into memory."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", default="default", help="Username to export (default: default).")
+        parser.add_argument("--format", choices=EXPORT_FORMATS, default="csv")
+        parser.add_argument("--start", type=date.fromisoformat, help="First local day to include (YYYY-MM-DD).")
+        parser.add_argument("--end", type=date.fromisoformat, help="Last local day to include (YYYY-MM-DD).")
+        parser.add_argument("--kind", choices=Entry.Kind.values)
+        parser.add_argument("--output", help="Write to this file instead of stdout.")
+        parser.add_argument("--trace-memory", action="store_true", help="Report peak Python memory on stderr.")
+
+    def handle(self, *args, **options):
+        user = get_user_model().objects.filter(username=options["user"]).first()
+        if user is None:
+            raise CommandError(f"User {options['user']!r} not found.")
+        if options["trace_memory"]:
+            tracemalloc.start()
+        rows = export_rows(user, start=options["start"], end=options["end"], kind=options["kind"])
+        output = open(options["output"], "w", newline="") if options["output"] else sys.stdout
+        size = 0
+        try:
+            for chunk in stream_export(rows, options["format"]):
+                output.write(chunk)
+                size += len(chunk)
+        finally:
+            if options["output"]:
+                output.close()
+        message = f"Exported {size} characters for {user.username}."
+        if options["trace_memory"]:
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            message += f" Peak traced memory: {peak / 1024:.0f} KiB."
+        self.stderr.write(self.style.SUCCESS(message))
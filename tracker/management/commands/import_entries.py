@@ -0,0 +1,36 @@
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from tracker.imports import import_entries
+
+
+class Command(BaseCommand):
+    help = "Bulk import historical entries from CSV (the export_entries column layout)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV file to import, or - for stdin.")
+        parser.add_argument("--user", default="default", help="Username to import into (default: default).")
+        parser.add_argument("--skip-invalid", action="store_true", help="Import valid rows and report invalid ones.")
+
+    def handle(self, *args, **options):
+        user = get_user_model().objects.filter(username=options["user"]).first()
+        if user is None:
+            raise CommandError(f"User {options['user']!r} not found.")
+        source = sys.stdin if options["path"] == "-" else open(options["path"], newline="", encoding="utf-8-sig")
+        try:
+            result = import_entries(user, source, skip_invalid=options["skip_invalid"])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        finally:
+            if source is not sys.stdin:
+                source.close()
+        for line_number, message in result.errors[:20]:
+            self.stdout.write(f"line {line_number}: {message}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {result.created} of {result.rows} rows ({result.quests_created} new quests) "
+                f"in {result.seconds:.2f}s, {result.rows_per_second:.0f} rows/s."
+            )
+        )
@@ -0,0 +1,24 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from tracker.ledger import rebuild_user_ledger
+
+
+class Command(BaseCommand):
+    help = "Recompute the materialized AP balance ledger from the Entry log."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", help="Only rebuild the ledger for this username.")
+
+    def handle(self, *args, **options):
+        users = get_user_model().objects.order_by("id")
+        if options["user"]:
+            users = users.filter(username=options["user"])
+            if not users.exists():
+                raise CommandError(f"User {options['user']!r} not found.")
+        count = 0
+        for user in users.iterator():
+            ledger = rebuild_user_ledger(user)
+            count += 1
+            self.stdout.write(f"{user.username}: {ledger.balance} AP (earned {ledger.earned}, spent {ledger.spent})")
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} ledger(s)."))
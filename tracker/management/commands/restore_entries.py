@@ -0,0 +1,32 @@
+from datetime import datetime
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from tracker.archive import restore_user
+
+
+class Command(BaseCommand):
+    help = "Move archived entries from a month onwards back into the Entry table."
+
+    def add_arguments(self, parser):
+        parser.add_argument("since", help="First month to restore (YYYY-MM).")
+        parser.add_argument("--user", help="Only restore entries for this username.")
+
+    def handle(self, *args, **options):
+        try:
+            since = datetime.strptime(options["since"], "%Y-%m").date()
+        except ValueError:
+            raise CommandError("since must be a month in YYYY-MM format.")
+        users = get_user_model().objects.order_by("id")
+        if options["user"]:
+            users = users.filter(username=options["user"])
+            if not users.exists():
+                raise CommandError(f"User {options['user']!r} not found.")
+        total = 0
+        for user in users.iterator():
+            restored = restore_user(user, since)
+            total += restored
+            if restored:
+                self.stdout.write(f"{user.username}: restored {restored} entries")
+        self.stdout.write(self.style.SUCCESS(f"Restored {total} entries from {since:%Y-%m} onwards."))
@@ -0,0 +1,61 @@
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from tracker.metrics import flush
+from tracker.routers import primary_reads
+from tracker.tasks import claim, prune_finished, requeue_stale, run_task, worker_name
+
+PRUNE_INTERVAL = 3600
+
+
+class Command(BaseCommand):
+    help = "Run queued background tasks from the Task table until stopped."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--burst", action="store_true", help="Exit once no task is due.")
+        parser.add_argument("--max-tasks", type=int, help="Exit after running this many tasks.")
+        parser.add_argument("--poll", type=float, help="Seconds to sleep when the queue is empty.")
+
+    def handle(self, *args, **options):
+        if options["max_tasks"] is not None and options["max_tasks"] < 1:
+            raise CommandError("--max-tasks must be at least 1.")
+        poll = options["poll"] if options["poll"] is not None else settings.TRACKER_WORKER_POLL_SECONDS
+        worker = worker_name()
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+        ran = failed = 0
+        last_prune = 0.0
+        self.stdout.write(f"Worker {worker} started.")
+        with primary_reads():
+            while not self.stopping:
+                close_old_connections()
+                requeue_stale()
+                task = claim(worker)
+                if task is None:
+                    if options["burst"]:
+                        break
+                    if time.monotonic() - last_prune >= PRUNE_INTERVAL:
+                        prune_finished()
+                        last_prune = time.monotonic()
+                    time.sleep(poll)
+                    continue
+                started = time.perf_counter()
+                ok = run_task(task, worker)
+                elapsed = (time.perf_counter() - started) * 1000
+                ran += 1
+                failed += not ok
+                status = "ok" if ok else self.style.ERROR("failed")
+                self.stdout.write(f"{task.name} #{task.pk} attempt {task.attempts}: {status} in {elapsed:.1f}ms")
+                if options["max_tasks"] and ran >= options["max_tasks"]:
+                    break
+        if settings.TRACKER_METRICS_ENABLED:
+            flush()
+        self.stdout.write(self.style.SUCCESS(f"Worker {worker} stopped after {ran} task(s), {failed} failed."))
+
+    def _stop(self, signum, frame):
+        self.stopping = True
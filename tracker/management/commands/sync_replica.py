@@ -0,0 +1,26 @@
+import sqlite3
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from tracker.routers import REPLICA, replica_configured
+
+
+class Command(BaseCommand):
+    help = "Copy the primary SQLite database into the local replica file (development only)."
+
+    def handle(self, *args, **options):
+        if not replica_configured():
+            raise CommandError("No replica database is configured (set TRACKER_DEV_REPLICA=True).")
+        primary, replica = connections[DEFAULT_DB_ALIAS], connections[REPLICA]
+        if primary.vendor != "sqlite" or replica.vendor != "sqlite":
+            raise CommandError("Only SQLite replicas can be synced; server replicas are kept current by the database.")
+        replica.close()
+        source = sqlite3.connect(primary.settings_dict["NAME"])
+        target = sqlite3.connect(replica.settings_dict["NAME"])
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
+        self.stdout.write(self.style.SUCCESS(f"Replica {replica.settings_dict['NAME']} synced from the primary."))
@@ -0,0 +1,62 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.utils.dateparse import parse_date
+
+from tracker.bench import run_weekly_report, seeded_database
+from tracker.reports import get_weekly_reports, last_complete_week, week_start
+
+
+class Command(BaseCommand):
+    help = "Generate and store per-user weekly reports for every account in one grouped pass per metric."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--week", help="Any date in the week to report (YYYY-MM-DD). Defaults to last week.")
+        parser.add_argument("--refresh", action="store_true", help="Recompute even if the week is already stored.")
+        parser.add_argument("--bench", help="Comma-separated user counts to benchmark against seeded test databases.")
+        parser.add_argument("--entries", type=int, default=200, help="Entries per seeded user when benchmarking.")
+
+    def handle(self, *args, **options):
+        if options["bench"]:
+            return self._bench(options)
+        week = last_complete_week()
+        if options["week"]:
+            week = parse_date(options["week"])
+            if week is None:
+                raise CommandError("--week must be a date in YYYY-MM-DD format.")
+        with CaptureQueriesContext(connection) as context:
+            started = time.perf_counter()
+            try:
+                reports = get_weekly_reports(week, refresh=options["refresh"])
+            except ValueError as exc:
+                raise CommandError(str(exc))
+            elapsed = (time.perf_counter() - started) * 1000
+        self.stdout.write(f"Week of {week_start(week)}")
+        for report in reports:
+            top = ", ".join(f"{preset['label']} x{preset['count']}" for preset in report.top_presets) or "-"
+            self.stdout.write(
+                f"  {report.user.username:<20} earned {report.earned:>6}  spent {report.spent:>6}  net {report.net:>6}"
+                f"  {report.minutes:>5} min  {top}"
+            )
+        self.stdout.write(
+            self.style.SUCCESS(f"{len(reports)} user(s) reported in {elapsed:.1f}ms with {len(context)} queries.")
+        )
+
+    def _bench(self, options):
+        try:
+            sizes = [int(size) for size in options["bench"].split(",") if size]
+        except ValueError:
+            raise CommandError("--bench must be a comma-separated list of integers.")
+        week = last_complete_week()
+        setup_test_environment()
+        try:
+            for users in sizes:
+                with seeded_database(users=users, entries=options["entries"], days=14):
+                    results = run_weekly_report(week)
+                self.stdout.write(f"{users} users")
+                for name, result in results.items():
+                    self.stdout.write(f"  {name:<10} {result['ms']:>10.1f}ms  {result['queries']:>6} queries")
+        finally:
+            teardown_test_environment()
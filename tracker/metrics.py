@@ -0,0 +1,292 @@
+import hmac
+import json
+import os
+import threading
+import time
+from contextlib import ExitStack
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+TASK_BUCKETS = (0.1, 0.5, 1.0, 5.0, 30.0, 60.0, 300.0)
+
+_lock = threading.Lock()
+_views = {}
+_fragments = {}
+_tasks = {}
+_last_flush = 0.0
+
+
+def metrics_dir():
+    return Path(settings.TRACKER_METRICS_DIR)
+
+
+class QueryRecorder:
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - started
+
+
+def _empty_view():
+    return {"requests": {}, "buckets": [0] * len(BUCKETS), "seconds": 0.0, "queries": 0, "db_seconds": 0.0}
+
+
+def _empty_task():
+    return {"runs": {}, "buckets": [0] * len(TASK_BUCKETS), "seconds": 0.0}
+
+
+def record_task(name, outcome, seconds):
+    if not settings.TRACKER_METRICS_ENABLED:
+        return
+    with _lock:
+        data = _tasks.setdefault(name, _empty_task())
+        data["runs"][outcome] = data["runs"].get(outcome, 0) + 1
+        for index, bound in enumerate(TASK_BUCKETS):
+            if seconds <= bound:
+                data["buckets"][index] += 1
+        data["seconds"] += seconds
+        due = time.monotonic() - _last_flush >= settings.TRACKER_METRICS_FLUSH_SECONDS
+    if due:
+        flush()
+
+
+def record_fragment(name, hit):
+    with _lock:
+        counts = _fragments.setdefault(name, {"hits": 0, "misses": 0})
+        counts["hits" if hit else "misses"] += 1
+        due = time.monotonic() - _last_flush >= settings.TRACKER_METRICS_FLUSH_SECONDS
+    if due:
+        flush()
+
+
+def record_request(view, method, status, seconds, queries, db_seconds):
+    global _last_flush
+    with _lock:
+        data = _views.setdefault(view, _empty_view())
+        key = f"{method} {status}"
+        data["requests"][key] = data["requests"].get(key, 0) + 1
+        for index, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                data["buckets"][index] += 1
+        data["seconds"] += seconds
+        data["queries"] += queries
+        data["db_seconds"] += db_seconds
+        due = time.monotonic() - _last_flush >= settings.TRACKER_METRICS_FLUSH_SECONDS
+    if due:
+        flush()
+
+
+def flush():
+    global _last_flush
+    directory = metrics_dir()
+    path = directory / f"{os.getpid()}.json"
+    with _lock:
+        payload = {
+            "views": _views,
+            "fragments": _fragments,
+            "tasks": _tasks,
+        }
+        directory.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_name(f"{os.getpid()}.{threading.get_ident()}.tmp")
+        temporary.write_text(json.dumps(payload))
+        os.replace(temporary, path)
+        _last_flush = time.monotonic()
+
+
+def scrape_allowed(request):
+    token = settings.TRACKER_METRICS_TOKEN
+    header = request.headers.get("Authorization", "")
+    if token and hmac.compare_digest(header.encode(), f"Bearer {token}".encode()):
+        return True
+    user = getattr(request, "user", None)
+    return bool(user and user.is_active and user.is_staff)
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _worker_files():
+    for path in metrics_dir().glob("*.json"):
+        if not path.stem.isdigit() or _pid_alive(int(path.stem)):
+            yield path
+            continue
+        try:
+            path.unlink()
+        except OSError:
+            pass
+
+
+def collect():
+    flush()
+    views = {}
+    fragments = {}
+    tasks = {}
+    for path in _worker_files():
+        try:
+            payload = json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue
+        for view, data in payload["views"].items():
+            merged = views.setdefault(view, _empty_view())
+            for key, count in data["requests"].items():
+                merged["requests"][key] = merged["requests"].get(key, 0) + count
+            merged["buckets"] = [left + right for left, right in zip(merged["buckets"], data["buckets"])]
+            for field in ("seconds", "queries", "db_seconds"):
+                merged[field] += data[field]
+        for name, counts in payload["fragments"].items():
+            merged = fragments.setdefault(name, {"hits": 0, "misses": 0})
+            merged["hits"] += counts.get("hits", 0)
+            merged["misses"] += counts.get("misses", 0)
+        for name, data in payload.get("tasks", {}).items():
+            merged = tasks.setdefault(name, _empty_task())
+            for outcome, count in data["runs"].items():
+                merged["runs"][outcome] = merged["runs"].get(outcome, 0) + count
+            merged["buckets"] = [left + right for left, right in zip(merged["buckets"], data["buckets"])]
+            merged["seconds"] += data["seconds"]
+    return views, fragments, tasks
+
+
+def fragment_stats(fragments):
+    stats = {}
+    for name, counts in sorted(fragments.items()):
+        total = counts["hits"] + counts["misses"]
+        stats[name] = {
+            "hits": counts["hits"],
+            "misses": counts["misses"],
+            "hit_rate": round(counts["hits"] / total, 4) if total else 0.0,
+        }
+    return stats
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render_prometheus(views, fragments, tasks=None, queue=None):
+    lines = [
+        "# HELP tracker_http_requests_total Requests handled, by view, method and status.",
+        "# TYPE tracker_http_requests_total counter",
+    ]
+    for view, data in sorted(views.items()):
+        for key, count in sorted(data["requests"].items()):
+            method, status = key.split(" ", 1)
+            lines.append(f'tracker_http_requests_total{{view="{_label(view)}",method="{method}",status="{status}"}} {count}')
+    lines += [
+        "# HELP tracker_http_request_duration_seconds Request latency, by view.",
+        "# TYPE tracker_http_request_duration_seconds histogram",
+    ]
+    for view, data in sorted(views.items()):
+        label = _label(view)
+        total = sum(data["requests"].values())
+        for bound, count in zip(BUCKETS, data["buckets"]):
+            lines.append(f'tracker_http_request_duration_seconds_bucket{{view="{label}",le="{bound}"}} {count}')
+        lines.append(f'tracker_http_request_duration_seconds_bucket{{view="{label}",le="+Inf"}} {total}')
+        lines.append(f'tracker_http_request_duration_seconds_sum{{view="{label}"}} {data["seconds"]:.6f}')
+        lines.append(f'tracker_http_request_duration_seconds_count{{view="{label}"}} {total}')
+    lines += [
+        "# HELP tracker_db_queries_total SQL queries issued, by view.",
+        "# TYPE tracker_db_queries_total counter",
+    ]
+    lines += [f'tracker_db_queries_total{{view="{_label(view)}"}} {data["queries"]}' for view, data in sorted(views.items())]
+    lines += [
+        "# HELP tracker_db_query_seconds_total Time spent in SQL, by view.",
+        "# TYPE tracker_db_query_seconds_total counter",
+    ]
+    lines += [
+        f'tracker_db_query_seconds_total{{view="{_label(view)}"}} {data["db_seconds"]:.6f}' for view, data in sorted(views.items())
+    ]
+    lines += [
+        "# HELP tracker_fragment_cache_requests_total Template fragment cache lookups, by fragment and result.",
+        "# TYPE tracker_fragment_cache_requests_total counter",
+    ]
+    for name, counts in sorted(fragments.items()):
+        for result in ("hits", "misses"):
+            lines.append(f'tracker_fragment_cache_requests_total{{fragment="{_label(name)}",result="{result}"}} {counts[result]}')
+    lines += [
+        "# HELP tracker_task_runs_total Background task runs, by task and outcome.",
+        "# TYPE tracker_task_runs_total counter",
+    ]
+    for name, data in sorted((tasks or {}).items()):
+        for outcome, count in sorted(data["runs"].items()):
+            lines.append(f'tracker_task_runs_total{{task="{_label(name)}",outcome="{outcome}"}} {count}')
+    lines += [
+        "# HELP tracker_task_duration_seconds Background task run time, by task.",
+        "# TYPE tracker_task_duration_seconds histogram",
+    ]
+    for name, data in sorted((tasks or {}).items()):
+        label = _label(name)
+        total = sum(data["runs"].values())
+        for bound, count in zip(TASK_BUCKETS, data["buckets"]):
+            lines.append(f'tracker_task_duration_seconds_bucket{{task="{label}",le="{bound}"}} {count}')
+        lines.append(f'tracker_task_duration_seconds_bucket{{task="{label}",le="+Inf"}} {total}')
+        lines.append(f'tracker_task_duration_seconds_sum{{task="{label}"}} {data["seconds"]:.6f}')
+        lines.append(f'tracker_task_duration_seconds_count{{task="{label}"}} {total}')
+    if queue is not None:
+        lines += [
+            "# HELP tracker_task_queue_depth Background tasks currently stored, by status.",
+            "# TYPE tracker_task_queue_depth gauge",
+        ]
+        lines += [f'tracker_task_queue_depth{{status="{status}"}} {count}' for status, count in sorted(queue.items())]
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.TRACKER_METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            _record_queries(stack, recorder)
+            response = self.get_response(request)
+        self._record(request, response, recorder, started)
+        return response
+
+    async def __acall__(self, request):
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            await sync_to_async(_record_queries)(stack, recorder)
+            response = await self.get_response(request)
+        self._record(request, response, recorder, started)
+        return response
+
+    def _record(self, request, response, recorder, started):
+        elapsed = time.perf_counter() - started
+        match = request.resolver_match
+        view = match.view_name if match else "unmatched"
+        record_request(view, request.method, response.status_code, elapsed, recorder.count, recorder.seconds)
+
+
+def _record_queries(stack, recorder):
+    for connection in connections.all():
+        stack.enter_context(connection.execute_wrapper(recorder))
@@ -0,0 +1,61 @@
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Q, Sum
+import django.db.models.deletion
+
+
+def backfill_ledgers(apps, schema_editor):
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split("."))
+    Entry = apps.get_model("tracker", "Entry")
+    UserLedger = apps.get_model("tracker", "UserLedger")
+    for user in User.objects.all().iterator():
+        entries = Entry.objects.filter(user=user)
+        totals = entries.aggregate(
+            earned=Sum("ap", filter=Q(kind="earn")),
+            spent=Sum("ap", filter=Q(kind="spend")),
+        )
+        latest = entries.order_by("-timestamp", "-id").values("id", "timestamp").first()
+        UserLedger.objects.update_or_create(
+            user=user,
+            defaults={
+                "earned": totals["earned"] or 0,
+                "spent": totals["spent"] or 0,
+                "last_entry_id": latest["id"] if latest else None,
+                "last_entry_at": latest["timestamp"] if latest else None,
+            },
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("tracker", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RenameIndex(
+            model_name="entry",
+            new_name="tracker_ent_user_id_f667de_idx",
+            old_name="tracker_ent_user_id_9a53d6_idx",
+        ),
+        migrations.CreateModel(
+            name="UserLedger",
+            fields=[
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                ("earned", models.PositiveBigIntegerField(default=0)),
+                ("spent", models.PositiveBigIntegerField(default=0)),
+                ("last_entry_id", models.BigIntegerField(blank=True, null=True)),
+                ("last_entry_at", models.DateTimeField(blank=True, null=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(backfill_ledgers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,62 @@
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+import django.db.models.deletion
+
+
+def backfill_daily_ledgers(apps, schema_editor):
+    Entry = apps.get_model("tracker", "Entry")
+    DailyLedger = apps.get_model("tracker", "DailyLedger")
+    rows = (
+        Entry.objects.annotate(day=TruncDate("timestamp", tzinfo=timezone.get_current_timezone()))
+        .values("user_id", "day")
+        .annotate(
+            earned=Sum("ap", filter=Q(kind="earn"), default=0),
+            spent=Sum("ap", filter=Q(kind="spend"), default=0),
+            minutes=Sum("minutes", filter=Q(kind="spend"), default=0),
+            earn_count=Count("id", filter=Q(kind="earn")),
+            spend_count=Count("id", filter=Q(kind="spend")),
+            entry_count=Count("id"),
+        )
+        .order_by()
+    )
+    DailyLedger.objects.bulk_create(
+        [DailyLedger(net=row["earned"] - row["spent"], **row) for row in rows],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("tracker", "0002_userledger"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailyLedger",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("day", models.DateField()),
+                ("earned", models.PositiveIntegerField(default=0)),
+                ("spent", models.PositiveIntegerField(default=0)),
+                ("net", models.IntegerField(default=0)),
+                ("minutes", models.PositiveIntegerField(default=0)),
+                ("earn_count", models.PositiveIntegerField(default=0)),
+                ("spend_count", models.PositiveIntegerField(default=0)),
+                ("entry_count", models.PositiveIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "user",
+                    models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+                ),
+            ],
+            options={
+                "ordering": ["-day"],
+                "unique_together": {("user", "day")},
+            },
+        ),
+        migrations.RunPython(backfill_daily_ledgers, migrations.RunPython.noop),
+    ]
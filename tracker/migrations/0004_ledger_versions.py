@@ -0,0 +1,30 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("tracker", "0003_dailyledger"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="userledger",
+            name="entry_version",
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="userledger",
+            name="preset_version",
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="userledger",
+            name="quest_version",
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="userledger",
+            name="settings_version",
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+    ]
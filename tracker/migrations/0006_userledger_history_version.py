@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("tracker", "0005_entry_client_event"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="userledger",
+            name="history_version",
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("tracker", "0006_userledger_history_version"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="entry",
+            index=models.Index(fields=["user", "kind", "timestamp", "ap"], name="tracker_entry_user_kind_ts"),
+        ),
+        migrations.AddIndex(
+            model_name="quest",
+            index=models.Index(
+                condition=models.Q(("status", "active")), fields=["user"], name="tracker_quest_active_idx"
+            ),
+        ),
+    ]
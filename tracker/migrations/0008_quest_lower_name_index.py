@@ -0,0 +1,21 @@
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("tracker", "0007_entry_quest_access_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="quest",
+            index=models.Index(
+                models.F("user"),
+                django.db.models.functions.text.Lower("name"),
+                name="tracker_quest_user_lower_name",
+            ),
+        ),
+    ]
@@ -0,0 +1,58 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("tracker", "0008_quest_lower_name_index"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="userledger",
+            name="archived_before",
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name="EntryArchive",
+            fields=[
+                ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                ("timestamp", models.DateTimeField()),
+                ("kind", models.CharField(choices=[("earn", "Earn"), ("spend", "Spend"), ("quest_complete", "Quest complete")], max_length=20)),
+                ("label", models.CharField(max_length=140)),
+                ("category", models.CharField(choices=[("Base", "Base"), ("Career", "Career"), ("Health", "Health"), ("Budget", "Budget"), ("OSRS", "OSRS")], max_length=20)),
+                ("ap", models.PositiveIntegerField()),
+                ("minutes", models.PositiveIntegerField(default=0)),
+                ("client_event_id", models.CharField(blank=True, max_length=64, null=True)),
+                ("archived_at", models.DateTimeField(auto_now_add=True)),
+                ("quest", models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to="tracker.quest")),
+                ("user", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                "ordering": ["-timestamp"],
+                "indexes": [models.Index(fields=["user", "timestamp"], name="tracker_ent_user_id_536733_idx")],
+            },
+        ),
+        migrations.CreateModel(
+            name="MonthlySummary",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("month", models.DateField()),
+                ("earned", models.PositiveBigIntegerField(default=0)),
+                ("spent", models.PositiveBigIntegerField(default=0)),
+                ("minutes", models.PositiveBigIntegerField(default=0)),
+                ("entry_count", models.PositiveIntegerField(default=0)),
+                ("days", models.JSONField(default=dict)),
+                ("categories", models.JSONField(default=dict)),
+                ("quests", models.JSONField(default=dict)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("user", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                "ordering": ["-month"],
+                "unique_together": {("user", "month")},
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("tracker", "0010_task_queue"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UserProgress",
+            fields=[
+                ("user", models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to=settings.AUTH_USER_MODEL)),
+                ("day", models.DateField()),
+                ("threshold", models.PositiveIntegerField(default=0)),
+                ("streak", models.PositiveIntegerField(default=0)),
+                ("best_streak", models.PositiveIntegerField(default=0)),
+                ("week_start", models.DateField()),
+                ("workout_days", models.PositiveIntegerField(default=0)),
+                ("workout_today", models.BooleanField(default=False)),
+                ("category_earned", models.JSONField(default=dict)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,52 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("tracker", "0011_user_progress"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="WeeklyReport",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("week", models.DateField()),
+                ("earned", models.PositiveIntegerField(default=0)),
+                ("spent", models.PositiveIntegerField(default=0)),
+                ("net", models.IntegerField(default=0)),
+                ("minutes", models.PositiveIntegerField(default=0)),
+                ("entry_count", models.PositiveIntegerField(default=0)),
+                ("quests", models.JSONField(default=list)),
+                ("top_presets", models.JSONField(default=list)),
+                ("generated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "ordering": ["-week", "user"],
+            },
+        ),
+        migrations.AddIndex(
+            model_name="dailyledger",
+            index=models.Index(fields=["day"], name="tracker_dailyledger_day"),
+        ),
+        migrations.AddIndex(
+            model_name="entry",
+            index=models.Index(fields=["kind", "timestamp"], name="tracker_entry_kind_ts"),
+        ),
+        migrations.AddField(
+            model_name="weeklyreport",
+            name="user",
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name="weeklyreport",
+            index=models.Index(fields=["week"], name="tracker_weeklyreport_week"),
+        ),
+        migrations.AlterUniqueTogether(
+            name="weeklyreport",
+            unique_together={("user", "week")},
+        ),
+    ]
@@ -1,5 +1,7 @@
 from django.conf import settings
 from django.db import models
+from django.db.models.functions import Lower
+from django.utils import timezone
 
 
 class UserSettings(models.Model):
@@ -56,8 +58,18 @@ class Quest(models.Model):
 
     class Meta:
         unique_together = ("user", "name")
+        indexes = [
+            models.Index(fields=["user"], condition=models.Q(status="active"), name="tracker_quest_active_idx"),
+            models.Index(models.F("user"), Lower("name"), name="tracker_quest_user_lower_name"),
+        ]
         ordering = ["-updated_at"]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_name = instance.__dict__.get("name")
+        return instance
+
     def __str__(self):
         return self.name
 
@@ -76,17 +88,178 @@ class Entry(models.Model):
         OSRS = "OSRS", "OSRS"
 
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Not auto_now_add: offline sync and imports supply their own timestamps,
+    # bounded by sync_events (SYNC_MAX_AGE) and imports.parse_row (nothing in the future).
+    timestamp = models.DateTimeField(default=timezone.now)
     kind = models.CharField(max_length=20, choices=Kind.choices)
     label = models.CharField(max_length=140)
     category = models.CharField(max_length=20, choices=Category.choices)
     ap = models.PositiveIntegerField()
     quest = models.ForeignKey(Quest, on_delete=models.SET_NULL, null=True, blank=True)
     minutes = models.PositiveIntegerField(default=0)
+    client_event_id = models.CharField(max_length=64, null=True, blank=True)
 
     class Meta:
-        indexes = [models.Index(fields=["user", "timestamp"])]
+        indexes = [
+            models.Index(fields=["user", "timestamp"]),
+            models.Index(fields=["user", "kind", "timestamp", "ap"], name="tracker_entry_user_kind_ts"),
+            models.Index(fields=["kind", "timestamp"], name="tracker_entry_kind_ts"),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=["user", "client_event_id"], name="tracker_entry_unique_client_event"),
+        ]
         ordering = ["-timestamp"]
 
     def __str__(self):
         return f"{self.label} ({self.ap} AP)"
+
+
+class UserLedger(models.Model):
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True)
+    earned = models.PositiveBigIntegerField(default=0)
+    spent = models.PositiveBigIntegerField(default=0)
+    last_entry_id = models.BigIntegerField(null=True, blank=True)
+    last_entry_at = models.DateTimeField(null=True, blank=True)
+    entry_version = models.PositiveBigIntegerField(default=0)
+    quest_version = models.PositiveBigIntegerField(default=0)
+    preset_version = models.PositiveBigIntegerField(default=0)
+    settings_version = models.PositiveBigIntegerField(default=0)
+    history_version = models.PositiveBigIntegerField(default=0)
+    archived_before = models.DateField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def balance(self):
+        return self.earned - self.spent
+
+    def __str__(self):
+        return f"Ledger for {self.user.username} ({self.balance} AP)"
+
+
+class DailyLedger(models.Model):
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    day = models.DateField()
+    earned = models.PositiveIntegerField(default=0)
+    spent = models.PositiveIntegerField(default=0)
+    net = models.IntegerField(default=0)
+    minutes = models.PositiveIntegerField(default=0)
+    earn_count = models.PositiveIntegerField(default=0)
+    spend_count = models.PositiveIntegerField(default=0)
+    entry_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("user", "day")
+        indexes = [models.Index(fields=["day"], name="tracker_dailyledger_day")]
+        ordering = ["-day"]
+
+    def __str__(self):
+        return f"{self.user.username} {self.day}: {self.net} AP net"
+
+
+class EntryArchive(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    timestamp = models.DateTimeField()
+    kind = models.CharField(max_length=20, choices=Entry.Kind.choices)
+    label = models.CharField(max_length=140)
+    category = models.CharField(max_length=20, choices=Entry.Category.choices)
+    ap = models.PositiveIntegerField()
+    quest = models.ForeignKey(Quest, on_delete=models.SET_NULL, null=True, blank=True)
+    minutes = models.PositiveIntegerField(default=0)
+    client_event_id = models.CharField(max_length=64, null=True, blank=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["user", "timestamp"])]
+        ordering = ["-timestamp"]
+
+    def __str__(self):
+        return f"{self.label} ({self.ap} AP, archived)"
+
+
+class MonthlySummary(models.Model):
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    month = models.DateField()
+    earned = models.PositiveBigIntegerField(default=0)
+    spent = models.PositiveBigIntegerField(default=0)
+    minutes = models.PositiveBigIntegerField(default=0)
+    entry_count = models.PositiveIntegerField(default=0)
+    days = models.JSONField(default=dict)
+    categories = models.JSONField(default=dict)
+    quests = models.JSONField(default=dict)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("user", "month")
+        ordering = ["-month"]
+
+    def __str__(self):
+        return f"{self.user.username} {self.month:%Y-%m}: {self.entry_count} archived entries"
+
+
+class Task(models.Model):
+    class Status(models.TextChoices):
+        QUEUED = "queued", "Queued"
+        RUNNING = "running", "Running"
+        DONE = "done", "Done"
+        FAILED = "failed", "Failed"
+
+    name = models.CharField(max_length=120)
+    kwargs = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.QUEUED)
+    run_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    locked_by = models.CharField(max_length=120, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    duration = models.FloatField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "run_at"], name="tracker_task_status_run_at"),
+        ]
+        ordering = ["run_at", "id"]
+
+    def __str__(self):
+        return f"{self.name} ({self.status})"
+
+
+class UserProgress(models.Model):
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True)
+    day = models.DateField()
+    threshold = models.PositiveIntegerField(default=0)
+    streak = models.PositiveIntegerField(default=0)
+    best_streak = models.PositiveIntegerField(default=0)
+    week_start = models.DateField()
+    workout_days = models.PositiveIntegerField(default=0)
+    workout_today = models.BooleanField(default=False)
+    category_earned = models.JSONField(default=dict)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Progress for {self.user.username} ({self.streak} day streak)"
+
+
+class WeeklyReport(models.Model):
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    week = models.DateField()
+    earned = models.PositiveIntegerField(default=0)
+    spent = models.PositiveIntegerField(default=0)
+    net = models.IntegerField(default=0)
+    minutes = models.PositiveIntegerField(default=0)
+    entry_count = models.PositiveIntegerField(default=0)
+    quests = models.JSONField(default=list)
+    top_presets = models.JSONField(default=list)
+    generated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("user", "week")
+        indexes = [models.Index(fields=["week"], name="tracker_weeklyreport_week")]
+        ordering = ["-week", "user"]
+
+    def __str__(self):
+        return f"{self.user.username} week of {self.week}: {self.net} AP net"
@@ -0,0 +1,164 @@
+import cProfile
+import hmac
+import json
+import os
+import re
+import time
+import traceback
+import uuid
+from contextlib import ExitStack
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+PROFILE_HEADER = "X-Tracker-Profile"
+PROFILE_PARAM = "profile"
+CAPTURE_ID = re.compile(r"^[0-9]{8}T[0-9]{6}-[A-Za-z0-9_.-]+-[0-9a-f]{8}$")
+ORIGIN_MODULES = ("tracker.services", "tracker.views", "tracker.api", "tracker.ledger", "tracker.stats")
+TRACKER_DIR = str(Path(__file__).resolve().parent)
+
+
+def profile_dir():
+    return Path(settings.TRACKER_PROFILE_DIR)
+
+
+def _origin():
+    frames = []
+    for frame in traceback.extract_stack()[:-2]:
+        if not frame.filename.startswith(TRACKER_DIR):
+            continue
+        module = "tracker." + Path(frame.filename).relative_to(TRACKER_DIR).with_suffix("").as_posix().replace("/", ".")
+        if module.startswith(ORIGIN_MODULES):
+            frames.append(f"{module}:{frame.name}:{frame.lineno}")
+    return frames
+
+
+class SqlTrace:
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            self.queries.append({"sql": sql, "ms": round(elapsed, 3), "many": many, "origin": _origin()})
+
+
+def _profile_value(request):
+    return request.headers.get(PROFILE_HEADER) or request.GET.get(PROFILE_PARAM)
+
+
+def profiling_requested(request):
+    value = _profile_value(request)
+    if not value:
+        return False
+    token = settings.TRACKER_PROFILE_TOKEN
+    if token and hmac.compare_digest(value.encode(), token.encode()):
+        return True
+    user = getattr(request, "user", None)
+    return bool(user and user.is_active and user.is_staff)
+
+
+def save_capture(request, response, profiler, trace, elapsed):
+    match = request.resolver_match
+    view = match.view_name if match else "unmatched"
+    now = timezone.now()
+    capture_id = f"{now:%Y%m%dT%H%M%S}-{re.sub(r'[^A-Za-z0-9_.-]', '_', view)}-{uuid.uuid4().hex[:8]}"
+    directory = profile_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    profiler.dump_stats(directory / f"{capture_id}.prof")
+    summary = {
+        "id": capture_id,
+        "captured_at": now.isoformat(),
+        "path": request.get_full_path(),
+        "method": request.method,
+        "view": view,
+        "status": response.status_code,
+        "total_ms": round(elapsed * 1000, 3),
+        "sql_count": len(trace.queries),
+        "sql_ms": round(sum(query["ms"] for query in trace.queries), 3),
+        "queries": trace.queries,
+    }
+    (directory / f"{capture_id}.json").write_text(json.dumps(summary, indent=2))
+    return capture_id
+
+
+def list_captures(limit=50):
+    directory = profile_dir()
+    if not directory.exists():
+        return []
+    paths = sorted(directory.glob("*.json"), key=os.path.getmtime, reverse=True)[:limit]
+    captures = []
+    for path in paths:
+        try:
+            summary = json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue
+        summary.pop("queries", None)
+        captures.append(summary)
+    return sorted(captures, key=lambda capture: capture["total_ms"], reverse=True)
+
+
+def capture_path(capture_id, suffix):
+    if not CAPTURE_ID.match(capture_id):
+        raise ValueError("Invalid capture id.")
+    path = profile_dir() / f"{capture_id}{suffix}"
+    if not path.exists():
+        raise ValueError("Capture not found.")
+    return path
+
+
+class ProfilerMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not profiling_requested(request):
+            return self.get_response(request)
+        profiler = cProfile.Profile()
+        trace = SqlTrace()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            _trace_queries(stack, trace)
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+        elapsed = time.perf_counter() - started
+        response["X-Tracker-Profile-Id"] = save_capture(request, response, profiler, trace, elapsed)
+        return response
+
+    async def __acall__(self, request):
+        if not _profile_value(request) or not await sync_to_async(profiling_requested)(request):
+            return await self.get_response(request)
+        profiler = cProfile.Profile()
+        trace = SqlTrace()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            await sync_to_async(_trace_queries)(stack, trace)
+            profiler.enable()
+            try:
+                response = await self.get_response(request)
+            finally:
+                profiler.disable()
+        elapsed = time.perf_counter() - started
+        response["X-Tracker-Profile-Id"] = save_capture(request, response, profiler, trace, elapsed)
+        return response
+
+
+def _trace_queries(stack, trace):
+    for connection in connections.all():
+        stack.enter_context(connection.execute_wrapper(trace))
@@ -0,0 +1,216 @@
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from .ledger import daily_totals_from_entries, get_today_range, get_week_range, local_day, lock_user_ledger
+from .models import DailyLedger, Entry, EntryArchive, MonthlySummary, UserProgress, UserSettings
+
+WORKOUT_CATEGORY = Entry.Category.HEALTH
+WORKOUT_WEEK_GOAL = 5
+STREAK_TIERS = (3, 7, 30, 100)
+CATEGORY_TIERS = (100, 500, 1000, 5000)
+STATE_FIELDS = (
+    "day",
+    "threshold",
+    "streak",
+    "best_streak",
+    "week_start",
+    "workout_days",
+    "workout_today",
+    "category_earned",
+)
+PROGRESS_SETTINGS = {"unlock_net_ap_today"}
+
+
+def _today():
+    tz = timezone.get_current_timezone()
+    start, _ = get_today_range(tz)
+    week_start, _ = get_week_range(tz)
+    return start.date(), week_start.date()
+
+
+def _threshold(user):
+    try:
+        return user.usersettings.unlock_net_ap_today
+    except UserSettings.DoesNotExist:
+        return 0
+
+
+def _met(net, threshold):
+    return net >= max(threshold, 1)
+
+
+def _streaks(met_days, through):
+    best = run = 0
+    previous = None
+    for day in sorted(met_days):
+        if day > through:
+            break
+        run = run + 1 if previous == day - timedelta(days=1) else 1
+        best = max(best, run)
+        previous = day
+    return (run if previous == through else 0), best
+
+
+def _workout_days(user, today):
+    start, end = get_week_range(timezone.get_current_timezone())
+    rows = (
+        model.objects.filter(
+            user=user,
+            kind=Entry.Kind.EARN,
+            category=WORKOUT_CATEGORY,
+            timestamp__gte=start,
+            timestamp__lt=end,
+        ).values_list("timestamp", flat=True)
+        for model in (Entry, EntryArchive)
+    )
+    days = {local_day(timestamp) for timestamps in rows for timestamp in timestamps}
+    return {day for day in days if day <= today}
+
+
+def _category_earned(user):
+    totals = {}
+    rows = Entry.objects.filter(user=user, kind=Entry.Kind.EARN).values("category").annotate(earned=Sum("ap")).order_by()
+    for row in rows:
+        totals[row["category"]] = row["earned"]
+    for categories in MonthlySummary.objects.filter(user=user).values_list("categories", flat=True):
+        for category, values in categories.items():
+            if values["earned"]:
+                totals[category] = totals.get(category, 0) + values["earned"]
+    return totals
+
+
+def compute_progress(user):
+    today, week_start = _today()
+    threshold = _threshold(user)
+    totals = daily_totals_from_entries(user)
+    streak, best = _streaks([day for day, row in totals.items() if _met(row["net"], threshold)], today - timedelta(days=1))
+    workouts = _workout_days(user, today)
+    return {
+        "day": today,
+        "threshold": threshold,
+        "streak": streak,
+        "best_streak": best,
+        "week_start": week_start,
+        "workout_days": len(workouts),
+        "workout_today": today in workouts,
+        "category_earned": _category_earned(user),
+    }
+
+
+def rebuild_progress(user):
+    with transaction.atomic():
+        lock_user_ledger(user)
+        progress, _ = UserProgress.objects.update_or_create(user=user, defaults=compute_progress(user))
+    return progress
+
+
+def refresh_progress(user):
+    progress = UserProgress.objects.filter(user=user).first()
+    if progress is None or progress.threshold != _threshold(user):
+        return rebuild_progress(user)
+    return progress
+
+
+def check_progress(user):
+    today, week_start = _today()
+    progress = UserProgress.objects.filter(user=user).first()
+    if progress is None:
+        return []
+    expected = compute_progress(user)
+    _roll(progress, today, week_start)
+    stored = {field: getattr(progress, field) for field in STATE_FIELDS}
+    return [(field, expected[field], stored[field]) for field in STATE_FIELDS if expected[field] != stored[field]]
+
+
+def _roll(progress, today, week_start):
+    if progress.day >= today:
+        return False
+    rows = DailyLedger.objects.filter(user_id=progress.user_id, day__gte=progress.day, day__lt=today)
+    net = dict(rows.values_list("day", "net"))
+    day = progress.day
+    while day < today:
+        progress.streak = progress.streak + 1 if _met(net.get(day, 0), progress.threshold) else 0
+        progress.best_streak = max(progress.best_streak, progress.streak)
+        day += timedelta(days=1)
+    progress.day = today
+    progress.workout_today = False
+    if progress.week_start != week_start:
+        progress.week_start = week_start
+        progress.workout_days = 0
+    return True
+
+
+def _recount_streak(progress, today):
+    rows = DailyLedger.objects.filter(user_id=progress.user_id, day__lt=today, net__gte=max(progress.threshold, 1))
+    met = rows.values_list("day", flat=True)
+    progress.streak, progress.best_streak = _streaks(met, today - timedelta(days=1))
+
+
+def get_progress(user):
+    today, week_start = _today()
+    progress = UserProgress.objects.filter(user=user).first()
+    if progress is None or progress.threshold != _threshold(user):
+        return UserProgress(user=user, **compute_progress(user))
+    _roll(progress, today, week_start)
+    return progress
+
+
+async def aget_progress(user):
+    today, _ = _today()
+    progress = await UserProgress.objects.filter(user=user).afirst()
+    if progress is None or progress.threshold != _threshold(user) or progress.day < today:
+        return await sync_to_async(get_progress)(user)
+    return progress
+
+
+def apply_progress(user, entries, sign=1):
+    today, week_start = _today()
+    earns = [entry for entry in entries if entry.kind == Entry.Kind.EARN]
+    backdated = [entry for entry in entries if local_day(entry.timestamp) < today]
+    if not earns and not backdated:
+        return None
+    progress = UserProgress.objects.filter(user=user).first()
+    if progress is None or progress.threshold != _threshold(user):
+        return rebuild_progress(user)
+    _roll(progress, today, week_start)
+    for entry in earns:
+        progress.category_earned[entry.category] = progress.category_earned.get(entry.category, 0) + sign * entry.ap
+    workouts = [entry for entry in earns if entry.category == WORKOUT_CATEGORY]
+    if workouts and (sign < 0 or any(local_day(entry.timestamp) != today for entry in workouts)):
+        days = _workout_days(user, today)
+        progress.workout_days = len(days)
+        progress.workout_today = today in days
+    elif workouts and not progress.workout_today:
+        progress.workout_today = True
+        progress.workout_days += 1
+    if backdated:
+        _recount_streak(progress, today)
+    progress.save()
+    return progress
+
+
+def progress_summary(progress, snapshot):
+    current = progress.streak + int(_met(snapshot.today["net"], progress.threshold))
+    best = max(progress.best_streak, current)
+    week_start = snapshot.now.date() - timedelta(days=snapshot.now.weekday())
+    workouts = progress.workout_days if progress.week_start == week_start else 0
+    achievements = [
+        {"label": f"{tier}-day unlock streak", "achieved": best >= tier, "progress": min(best, tier), "goal": tier}
+        for tier in STREAK_TIERS
+    ]
+    for category, earned in sorted(progress.category_earned.items()):
+        goal = next((tier for tier in CATEGORY_TIERS if earned < tier), CATEGORY_TIERS[-1])
+        achievements.append(
+            {"label": f"{category} {goal} AP", "achieved": earned >= goal, "progress": min(earned, goal), "goal": goal}
+        )
+    return {
+        "streak": current,
+        "best_streak": best,
+        "workout_days": workouts,
+        "workout_goal": WORKOUT_WEEK_GOAL,
+        "achievements": achievements,
+    }
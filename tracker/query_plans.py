@@ -0,0 +1,96 @@
+import re
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from .ledger import rebuild_user_ledger
+from .models import Entry
+from .progress import get_progress
+from .routers import primary_reads
+from .services import (
+    balance,
+    get_active_quest,
+    get_log_page,
+    get_quest_progress,
+    recent_quests,
+    search_quests,
+    take_snapshot,
+    today_totals,
+    undo_last_spend,
+    week_totals,
+)
+from .stats import get_stats
+from .views import recent_entries
+
+FULL_SCAN_PATTERNS = {
+    "sqlite": re.compile(r"\bSCAN (tracker_\w+)\b(?! USING (?:COVERING )?INDEX| USING INTEGER PRIMARY KEY)"),
+    "postgresql": re.compile(r"Seq Scan on (tracker_\w+)"),
+}
+EXPLAIN_PREFIXES = {"sqlite": "EXPLAIN QUERY PLAN ", "postgresql": "EXPLAIN "}
+
+
+def _log_pages(user):
+    _, cursor = get_log_page(user, kind=Entry.Kind.SPEND)
+    if cursor:
+        get_log_page(user, cursor=cursor, kind=Entry.Kind.SPEND)
+
+
+def service_calls(user):
+    today = timezone.localdate()
+    return [
+        ("snapshot", lambda: take_snapshot(user)),
+        ("active_quest", lambda: get_active_quest(user)),
+        ("recent_quests", lambda: list(recent_quests(user))),
+        ("quest_search", lambda: search_quests(user, "cook")),
+        ("quest_progress", lambda: get_quest_progress(user)),
+        ("recent_entries", lambda: list(recent_entries(user))),
+        ("log_pages", lambda: _log_pages(user)),
+        ("today_totals", lambda: today_totals(user)),
+        ("week_totals", lambda: week_totals(user)),
+        ("balance", lambda: balance(user)),
+        ("stats_today", lambda: get_stats(user, today, today)),
+        ("progress", lambda: get_progress(user)),
+        ("rebuild_user_ledger", lambda: rebuild_user_ledger(user)),
+        ("undo_last_spend", lambda: undo_last_spend(user)),
+    ]
+
+
+def service_queries(user):
+    captured = []
+    for name, call in service_calls(user):
+        with CaptureQueriesContext(connections[DEFAULT_DB_ALIAS]) as context, primary_reads():
+            try:
+                with transaction.atomic():
+                    call()
+                    transaction.set_rollback(True)
+            except ValueError:
+                pass
+        selects = [query["sql"] for query in context.captured_queries if query["sql"].lstrip().upper().startswith("SELECT")]
+        for index, sql in enumerate(selects, 1):
+            captured.append((f"{name}#{index}" if len(selects) > 1 else name, sql))
+    return captured
+
+
+def full_scans(plan, vendor):
+    pattern = FULL_SCAN_PATTERNS.get(vendor)
+    if pattern is None:
+        raise ValueError(f"No full-scan detector for {vendor}.")
+    return sorted(set(pattern.findall(plan)))
+
+
+def explain_queries(user, using="default"):
+    connection = connections[using]
+    prefix = EXPLAIN_PREFIXES.get(connection.vendor)
+    if prefix is None:
+        raise ValueError(f"No EXPLAIN support for {connection.vendor}.")
+    queries = service_queries(user)
+    results = []
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute("SET LOCAL enable_seqscan = off")
+        for name, sql in queries:
+            cursor.execute(prefix + sql)
+            plan = "\n".join(" ".join(str(column) for column in row) for row in cursor.fetchall())
+            results.append((name, plan, full_scans(plan, connection.vendor)))
+    return results
@@ -0,0 +1,118 @@
+from datetime import datetime, time, timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from .models import DailyLedger, Entry, EntryArchive, UserLedger, WeeklyReport
+
+TOP_PRESETS = 5
+TOTAL_FIELDS = ("earned", "spent", "minutes", "entry_count")
+
+
+def week_start(day):
+    return day - timedelta(days=day.weekday())
+
+
+def last_complete_week():
+    return week_start(timezone.localdate()) - timedelta(days=7)
+
+
+def _week_range(week):
+    tz = timezone.get_current_timezone()
+    start = timezone.make_aware(datetime.combine(week, time.min), tz)
+    end = timezone.make_aware(datetime.combine(week + timedelta(days=7), time.min), tz)
+    return start, end
+
+
+def _sources(week):
+    if UserLedger.objects.filter(archived_before__gt=week).exists():
+        return (Entry, EntryArchive)
+    return (Entry,)
+
+
+def _grouped(queryset, user_ids):
+    if user_ids is not None:
+        queryset = queryset.filter(user_id__in=user_ids)
+    return queryset.order_by()
+
+
+def _totals(week, user_ids):
+    rows = DailyLedger.objects.filter(day__gte=week, day__lt=week + timedelta(days=7))
+    return _grouped(rows, user_ids).values("user_id").annotate(**{field: Sum(field) for field in TOTAL_FIELDS})
+
+
+def _quest_minutes(model, start, end, user_ids):
+    rows = model.objects.filter(kind=Entry.Kind.SPEND, timestamp__gte=start, timestamp__lt=end, quest__isnull=False)
+    return _grouped(rows, user_ids).values("user_id", "quest_id", "quest__name").annotate(minutes=Sum("minutes"))
+
+
+def _preset_counts(model, start, end, user_ids):
+    rows = model.objects.filter(kind=Entry.Kind.EARN, timestamp__gte=start, timestamp__lt=end)
+    return _grouped(rows, user_ids).values("user_id", "label", "category").annotate(count=Count("id"), ap=Sum("ap"))
+
+
+def compute_weekly_reports(week, user_ids=None):
+    start, end = _week_range(week)
+    users = get_user_model().objects.order_by("id")
+    if user_ids is not None:
+        users = users.filter(pk__in=user_ids)
+    reports = {pk: WeeklyReport(user_id=pk, week=week) for pk in users.values_list("pk", flat=True)}
+    for row in _totals(week, user_ids):
+        report = reports.get(row["user_id"])
+        if report is None:
+            continue
+        for field in TOTAL_FIELDS:
+            setattr(report, field, row[field])
+        report.net = report.earned - report.spent
+    quests = {}
+    presets = {}
+    for model in _sources(week):
+        for row in _quest_minutes(model, start, end, user_ids):
+            key = (row["user_id"], row["quest_id"])
+            quest = quests.setdefault(key, {"quest_id": row["quest_id"], "name": row["quest__name"], "minutes": 0})
+            quest["minutes"] += row["minutes"]
+        for row in _preset_counts(model, start, end, user_ids):
+            key = (row["user_id"], row["label"], row["category"])
+            preset = presets.setdefault(key, {"label": row["label"], "category": row["category"], "count": 0, "ap": 0})
+            preset["count"] += row["count"]
+            preset["ap"] += row["ap"]
+    for (user_id, _), quest in quests.items():
+        if user_id in reports:
+            reports[user_id].quests.append(quest)
+    for (user_id, _, _), preset in presets.items():
+        if user_id in reports:
+            reports[user_id].top_presets.append(preset)
+    for report in reports.values():
+        report.quests.sort(key=lambda quest: (-quest["minutes"], quest["name"]))
+        report.top_presets.sort(key=lambda preset: (-preset["count"], -preset["ap"], preset["label"]))
+        del report.top_presets[TOP_PRESETS:]
+    return reports
+
+
+def get_weekly_reports(week, refresh=False):
+    week = week_start(week)
+    current = week_start(timezone.localdate())
+    if week > current:
+        raise ValueError("That week has not started yet.")
+    users = list(get_user_model().objects.order_by("id").only("id", "username"))
+    if week == current:
+        reports = compute_weekly_reports(week)
+    else:
+        reports = {} if refresh else {report.user_id: report for report in WeeklyReport.objects.filter(week=week)}
+        missing = [user.pk for user in users if user.pk not in reports]
+        if missing:
+            computed = compute_weekly_reports(week, None if len(missing) == len(users) else missing)
+            stale = WeeklyReport.objects.filter(week=week)
+            if len(missing) < len(users):
+                stale = stale.filter(user_id__in=missing)
+            with transaction.atomic():
+                stale.delete()
+                WeeklyReport.objects.bulk_create(computed.values(), ignore_conflicts=True)
+            reports.update(computed)
+    for user in users:
+        if user.pk in reports:
+            reports[user.pk].user = user
+    return [reports[user.pk] for user in users if user.pk in reports]
+
@@ -1,62 +1,174 @@
-from datetime import datetime, time, timedelta
+import sys
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import timedelta
 
+from asgiref.sync import sync_to_async
 from django.db import transaction
-from django.db.models import Sum
+from django.db.models import Case, Count, F, FilteredRelation, OuterRef, Q, Subquery, Sum, When
+from django.db.models.functions import Greatest, Lower
 from django.utils import timezone
-
-from .models import Entry, Quest
+from django.utils.dateparse import parse_datetime
+
+from .cache import get_user_settings, invalidate_presets
+from .ledger import (
+    VERSION_FIELDS,
+    bump_versions,
+    get_today_range,
+    get_user_ledger,
+    get_week_range,
+    local_day,
+    lock_user_ledger,
+    record_entries,
+    unrecord_entries,
+)
+from .models import DailyLedger, EarnPreset, Entry, Quest, UserLedger
+from .progress import apply_progress
+from .tasks import enqueue
 
 SPEND_COSTS = {10: 30, 18: 60, 30: 120}
-
-
-def get_today_range(tz):
-    now = timezone.localtime(timezone.now(), tz)
-    start = datetime.combine(now.date(), time.min)
-    end = start + timedelta(days=1)
-    return timezone.make_aware(start, tz), timezone.make_aware(end, tz)
-
-
-def get_week_range(tz, monday_start=True):
-    now = timezone.localtime(timezone.now(), tz)
-    weekday = now.weekday() if monday_start else (now.weekday() + 1) % 7
-    start_date = now.date() - timedelta(days=weekday)
-    start = datetime.combine(start_date, time.min)
-    end = start + timedelta(days=7)
-    return timezone.make_aware(start, tz), timezone.make_aware(end, tz)
-
-
-def _sum_entries(entries, kind):
-    return entries.filter(kind=kind).aggregate(total=Sum("ap"))["total"] or 0
+LOG_PAGE_SIZE = 50
+QUEST_SEARCH_LIMIT = 20
+QUEST_STATUS_RANK = Case(
+    When(status=Quest.Status.ACTIVE, then=0),
+    When(status=Quest.Status.NOT_STARTED, then=1),
+    default=2,
+)
 
 
 def today_totals(user):
     tz = timezone.get_current_timezone()
-    start, end = get_today_range(tz)
-    entries = Entry.objects.filter(user=user, timestamp__gte=start, timestamp__lt=end)
-    earned = _sum_entries(entries, Entry.Kind.EARN)
-    spent = _sum_entries(entries, Entry.Kind.SPEND)
-    return {"earned": earned, "spent": spent, "net": earned - spent}
+    start, _ = get_today_range(tz)
+    row = DailyLedger.objects.filter(user=user, day=start.date()).values("earned", "spent", "net").first()
+    return row or {"earned": 0, "spent": 0, "net": 0}
 
 
 def week_totals(user):
     tz = timezone.get_current_timezone()
     start, end = get_week_range(tz)
-    entries = Entry.objects.filter(user=user, timestamp__gte=start, timestamp__lt=end)
-    earned = _sum_entries(entries, Entry.Kind.EARN)
-    spent = _sum_entries(entries, Entry.Kind.SPEND)
-    return {"earned": earned, "spent": spent, "net": earned - spent}
+    rows = DailyLedger.objects.filter(user=user, day__gte=start.date(), day__lt=end.date())
+    totals = rows.aggregate(earned=Sum("earned", default=0), spent=Sum("spent", default=0))
+    return {"earned": totals["earned"], "spent": totals["spent"], "net": totals["earned"] - totals["spent"]}
 
 
 def balance(user):
-    earned = Entry.objects.filter(user=user, kind=Entry.Kind.EARN).aggregate(total=Sum("ap"))["total"] or 0
-    spent = Entry.objects.filter(user=user, kind=Entry.Kind.SPEND).aggregate(total=Sum("ap"))["total"] or 0
-    return earned - spent
+    return get_user_ledger(user).balance
+
+
+def _snapshot_rows(user, today, week_start):
+    week_days = FilteredRelation(
+        "user__dailyledger",
+        condition=Q(user__dailyledger__day__gte=week_start, user__dailyledger__day__lt=week_start + timedelta(days=7)),
+    )
+    active_quest = Quest.objects.filter(user=OuterRef("user"), status=Quest.Status.ACTIVE).values("id")[:1]
+    return (
+        UserLedger.objects.filter(user=user)
+        .annotate(week_days=week_days, active_quest_id=Subquery(active_quest))
+        .values("earned", "spent", "active_quest_id", *VERSION_FIELDS)
+        .annotate(
+            today_earned=Sum("week_days__earned", filter=Q(week_days__day=today), default=0),
+            today_spent=Sum("week_days__spent", filter=Q(week_days__day=today), default=0),
+            week_earned=Sum("week_days__earned", default=0),
+            week_spent=Sum("week_days__spent", default=0),
+        )
+        .order_by("user")
+    )
+
+
+class LedgerSnapshot:
+    def __init__(self, user, now=None, load=True):
+        self.user = user
+        self.settings = user.usersettings
+        self.now = timezone.localtime(now or timezone.now(), timezone.get_current_timezone())
+        if load:
+            self.refresh()
+
+    @property
+    def balance(self):
+        return self.earned - self.spent
+
+    def _days(self):
+        today = self.now.date()
+        return today, today - timedelta(days=self.now.weekday())
+
+    def refresh(self):
+        rows = _snapshot_rows(self.user, *self._days())
+        row = rows.first()
+        if row is None:
+            get_user_ledger(self.user)
+            row = rows.first()
+        if self._stale_settings(row):
+            self._refresh_settings(row)
+        self._load(row)
+
+    async def arefresh(self):
+        rows = _snapshot_rows(self.user, *self._days())
+        row = await rows.afirst()
+        if row is None:
+            await sync_to_async(get_user_ledger)(self.user)
+            row = await rows.afirst()
+        if self._stale_settings(row):
+            await sync_to_async(self._refresh_settings)(row)
+        self._load(row)
+
+    def _stale_settings(self, row):
+        version = getattr(self.settings, "version", None)
+        return version is not None and version != row["settings_version"]
+
+    def _refresh_settings(self, row):
+        self.settings = self.user.usersettings = get_user_settings(self.user, row["settings_version"])
+
+    def _load(self, row):
+        self.earned = row["earned"]
+        self.spent = row["spent"]
+        self.active_quest_id = row["active_quest_id"]
+        self.today = {
+            "earned": row["today_earned"],
+            "spent": row["today_spent"],
+            "net": row["today_earned"] - row["today_spent"],
+        }
+        self.week = {
+            "earned": row["week_earned"],
+            "spent": row["week_spent"],
+            "net": row["week_earned"] - row["week_spent"],
+        }
+        self.versions = {field.removesuffix("_version"): row[field] for field in VERSION_FIELDS}
+
+    def apply(self, entries, sign=1):
+        today = self.now.date()
+        week_start = today - timedelta(days=self.now.weekday())
+        for entry in entries:
+            field = {Entry.Kind.EARN: "earned", Entry.Kind.SPEND: "spent"}.get(entry.kind)
+            if field is None:
+                continue
+            amount = sign * entry.ap
+            setattr(self, field, getattr(self, field) + amount)
+            day = local_day(entry.timestamp)
+            if day == today:
+                self.today[field] += amount
+            if week_start <= day < week_start + timedelta(days=7):
+                self.week[field] += amount
+        for totals in (self.today, self.week):
+            totals["net"] = totals["earned"] - totals["spent"]
+
+
+def take_snapshot(user, now=None):
+    return LedgerSnapshot(user, now)
+
+
+async def atake_snapshot(user, now=None):
+    snapshot = LedgerSnapshot(user, now, load=False)
+    await snapshot.arefresh()
+    return snapshot
 
 
 def get_active_quest(user):
     return Quest.objects.filter(user=user, status=Quest.Status.ACTIVE).first()
 
 
+async def aget_active_quest(user):
+    return await Quest.objects.filter(user=user, status=Quest.Status.ACTIVE).afirst()
+
+
 def set_active_quest(user, quest_id):
     quest = Quest.objects.filter(user=user, id=quest_id).first()
     if not quest:
@@ -64,115 +176,460 @@ def set_active_quest(user, quest_id):
     if quest.status == Quest.Status.COMPLETED:
         raise ValueError("Completed quests cannot be set active.")
     Quest.objects.filter(user=user, status=Quest.Status.ACTIVE).update(status=Quest.Status.NOT_STARTED)
+    bump_versions(user.pk, "quest_version")
     quest.status = Quest.Status.ACTIVE
     quest.save(update_fields=["status", "updated_at"])
     return quest
 
 
-def can_earn(user, ap_to_add):
-    settings = user.usersettings
-    totals = today_totals(user)
-    return totals["earned"] + ap_to_add <= settings.daily_earn_cap
+def can_earn(user, ap_to_add, snapshot=None):
+    snapshot = snapshot or take_snapshot(user)
+    return snapshot.today["earned"] + ap_to_add <= snapshot.settings.daily_earn_cap
 
 
-def is_osrs_unlocked_today(user):
-    settings = user.usersettings
-    totals = today_totals(user)
-    return totals["net"] >= settings.unlock_net_ap_today
+def is_osrs_unlocked_today(user, snapshot=None):
+    snapshot = snapshot or take_snapshot(user)
+    return snapshot.today["net"] >= snapshot.settings.unlock_net_ap_today
 
 
-def is_saturday_locked_now(user, now=None):
-    settings = user.usersettings
+def is_saturday_locked_now(user, now=None, snapshot=None):
+    settings = snapshot.settings if snapshot else user.usersettings
     if not settings.saturday_lock_enabled:
         return False
-    now = now or timezone.localtime()
+    now = now or (snapshot.now if snapshot else timezone.localtime())
     if now.weekday() != 5:
         return False
     unlock_time = settings.saturday_unlock_time
     return now.time() < unlock_time
 
 
-def spend_ap(user, cost):
+def _locked_snapshot(user, snapshot):
+    lock_user_ledger(user)
+    if snapshot is None:
+        return take_snapshot(user)
+    snapshot.refresh()
+    return snapshot
+
+
+def spend_ap(user, cost, snapshot=None):
     if cost not in SPEND_COSTS:
         raise ValueError("Spend amount must be 10, 18, or 30 AP.")
-    quest = get_active_quest(user)
-    if not quest:
-        raise ValueError("Select an active quest before spending AP.")
-    if not is_osrs_unlocked_today(user):
-        raise ValueError("OSRS spending locked until your net AP today meets the unlock threshold.")
-    if is_saturday_locked_now(user):
-        raise ValueError("OSRS spending is locked until the Saturday unlock time.")
-    if balance(user) < cost:
-        raise ValueError("Insufficient AP balance.")
     minutes = SPEND_COSTS[cost]
     with transaction.atomic():
-        Entry.objects.create(
+        snapshot = _locked_snapshot(user, snapshot)
+        quest_id = snapshot.active_quest_id
+        if not quest_id:
+            raise ValueError("Select an active quest before spending AP.")
+        if not is_osrs_unlocked_today(user, snapshot=snapshot):
+            raise ValueError("OSRS spending locked until your net AP today meets the unlock threshold.")
+        if is_saturday_locked_now(user, snapshot=snapshot):
+            raise ValueError("OSRS spending is locked until the Saturday unlock time.")
+        if snapshot.balance < cost:
+            raise ValueError("Insufficient AP balance.")
+        entry = Entry.objects.create(
             user=user,
             kind=Entry.Kind.SPEND,
             label="Quest session",
             category=Entry.Category.OSRS,
             ap=cost,
-            quest=quest,
+            quest_id=quest_id,
             minutes=minutes,
         )
-        quest.minutes_logged += minutes
-        quest.save(update_fields=["minutes_logged", "updated_at"])
-    return quest
+        Quest.objects.filter(pk=quest_id).update(minutes_logged=F("minutes_logged") + minutes, updated_at=entry.timestamp)
+        record_entries(user, [entry], versions=("quest_version",))
+        apply_progress(user, [entry])
+    snapshot.apply([entry])
+    return entry
 
 
-def earn_from_preset(user, preset_id):
+def _create_earn(user, label, category, ap, snapshot):
+    with transaction.atomic():
+        snapshot = _locked_snapshot(user, snapshot)
+        if not can_earn(user, ap, snapshot=snapshot):
+            raise ValueError("Daily AP cap reached.")
+        entry = Entry.objects.create(
+            user=user,
+            kind=Entry.Kind.EARN,
+            label=label,
+            category=category,
+            ap=ap,
+        )
+        record_entries(user, [entry])
+        apply_progress(user, [entry])
+    snapshot.apply([entry])
+    return entry
+
+
+def earn_from_preset(user, preset_id, snapshot=None):
     preset = user.earnpreset_set.filter(id=preset_id).first()
     if not preset:
         raise ValueError("Preset not found.")
-    if not can_earn(user, preset.ap):
-        raise ValueError("Daily AP cap reached.")
-    Entry.objects.create(
-        user=user,
-        kind=Entry.Kind.EARN,
-        label=preset.label,
-        category=preset.category,
-        ap=preset.ap,
-    )
+    return _create_earn(user, preset.label, preset.category, preset.ap, snapshot)
 
 
-def create_custom_earn(user, label, category, ap):
-    if not can_earn(user, ap):
-        raise ValueError("Daily AP cap reached.")
-    Entry.objects.create(
-        user=user,
-        kind=Entry.Kind.EARN,
-        label=label,
-        category=category,
-        ap=ap,
-    )
+def create_custom_earn(user, label, category, ap, snapshot=None):
+    return _create_earn(user, label, category, ap, snapshot)
 
 
-def undo_last_spend(user):
-    last_spend = Entry.objects.filter(user=user, kind=Entry.Kind.SPEND).order_by("-timestamp").first()
-    if not last_spend:
-        raise ValueError("No spend entries to undo.")
-    quest = last_spend.quest
-    minutes = last_spend.minutes
+def undo_last_spend(user, snapshot=None):
     with transaction.atomic():
-        last_spend.delete()
-        if quest:
-            quest.minutes_logged = max(0, quest.minutes_logged - minutes)
-            quest.save(update_fields=["minutes_logged", "updated_at"])
+        lock_user_ledger(user)
+        if snapshot is not None:
+            snapshot.refresh()
+        last_spend = Entry.objects.filter(user=user, kind=Entry.Kind.SPEND).order_by("-timestamp").first()
+        if not last_spend:
+            raise ValueError("No spend entries to undo.")
+        entry_id = last_spend.id
+        quest_id = last_spend.quest_id
+        unrecord_entries(user, [last_spend], versions=("quest_version",) if quest_id else ())
+        if snapshot is not None:
+            snapshot.apply([last_spend], sign=-1)
+        Entry.objects.filter(pk=entry_id).delete()
+        apply_progress(user, [last_spend], sign=-1)
+        if quest_id:
+            Quest.objects.filter(pk=quest_id).update(
+                minutes_logged=Greatest(F("minutes_logged") - last_spend.minutes, 0), updated_at=timezone.now()
+            )
+    return entry_id
 
 
 def mark_quest_complete(user, quest_id):
     quest = Quest.objects.filter(user=user, id=quest_id).first()
     if not quest:
         raise ValueError("Quest not found.")
-    quest.status = Quest.Status.COMPLETED
-    quest.save(update_fields=["status", "updated_at"])
-    Entry.objects.create(
-        user=user,
-        kind=Entry.Kind.QUEST_COMPLETE,
-        label="Quest completed",
-        category=Entry.Category.OSRS,
-        ap=0,
-        quest=quest,
-        minutes=0,
+    with transaction.atomic():
+        quest.status = Quest.Status.COMPLETED
+        quest.save(update_fields=["status", "updated_at"])
+        entry = Entry.objects.create(
+            user=user,
+            kind=Entry.Kind.QUEST_COMPLETE,
+            label="Quest completed",
+            category=Entry.Category.OSRS,
+            ap=0,
+            quest=quest,
+            minutes=0,
+        )
+        record_entries(user, [entry])
+        apply_progress(user, [entry])
+        enqueue("tracker.refresh_quest", unique=True, quest_id=quest.pk)
+    return entry
+
+
+QUEST_PROGRESS = {"completed": Count("id", filter=Q(status=Quest.Status.COMPLETED)), "total": Count("id")}
+
+
+def get_quest_progress(user):
+    totals = Quest.objects.filter(user=user).aggregate(**QUEST_PROGRESS)
+    return totals["completed"], totals["total"]
+
+
+async def aget_quest_progress(user):
+    totals = await Quest.objects.filter(user=user).aaggregate(**QUEST_PROGRESS)
+    return totals["completed"], totals["total"]
+
+
+def _ranked_quests(user):
+    return (
+        Quest.objects.filter(user=user)
+        .annotate(name_lower=Lower("name"), status_rank=QUEST_STATUS_RANK)
+        .order_by("status_rank", "-updated_at")
     )
-    return quest
+
+
+def recent_quests(user, limit=QUEST_SEARCH_LIMIT):
+    return _ranked_quests(user)[:limit]
+
+
+def search_quests(user, query="", limit=QUEST_SEARCH_LIMIT):
+    quests = _ranked_quests(user)
+    query = query.strip().lower()
+    if not query:
+        return list(quests[:limit])
+    prefix = quests.filter(name_lower__gte=query, name_lower__startswith=query)
+    if ord(query[-1]) < sys.maxunicode:
+        prefix = prefix.filter(name_lower__lt=query[:-1] + chr(ord(query[-1]) + 1))
+    matches = list(prefix[:limit])
+    if len(matches) < limit:
+        substring = quests.filter(name_lower__contains=query).exclude(pk__in=[quest.pk for quest in matches])
+        matches += substring[: limit - len(matches)]
+    return matches
+
+
+def get_spend_options(snapshot, active_quest):
+    saturday_locked = is_saturday_locked_now(snapshot.user, snapshot=snapshot)
+    unlocked_today = is_osrs_unlocked_today(snapshot.user, snapshot=snapshot)
+    options = []
+    for cost, minutes in SPEND_COSTS.items():
+        enabled = True
+        reason = ""
+        if not active_quest:
+            enabled = False
+            reason = "Select an active quest"
+        elif saturday_locked:
+            enabled = False
+            unlock_time = snapshot.settings.saturday_unlock_time.strftime("%H:%M")
+            reason = f"Locked until {unlock_time}"
+        elif not unlocked_today:
+            enabled = False
+            reason = "Net AP today below unlock"
+        elif snapshot.balance < cost:
+            enabled = False
+            reason = "Insufficient balance"
+        options.append({"cost": cost, "minutes": minutes, "enabled": enabled, "reason": reason})
+    return options
+
+
+PRESET_BULK_ACTIONS = ("activate", "deactivate", "delete")
+
+
+def _presets_changed(user):
+    invalidate_presets(user.pk)
+    bump_versions(user.pk, "preset_version")
+
+
+def reorder_presets(user, preset_ids):
+    preset_ids = list(dict.fromkeys(int(preset_id) for preset_id in preset_ids))
+    with transaction.atomic():
+        presets = {preset.pk: preset for preset in EarnPreset.objects.select_for_update().filter(user=user)}
+        requested = set(preset_ids)
+        if requested - presets.keys():
+            raise ValueError("Preset not found.")
+        ordered = [presets[preset_id] for preset_id in preset_ids]
+        rest = sorted(
+            (preset for preset in presets.values() if preset.pk not in requested),
+            key=lambda preset: (preset.sort_order, preset.label),
+        )
+        now = timezone.now()
+        changed = []
+        for index, preset in enumerate(ordered + rest):
+            sort_order = (index + 1) * 10
+            if preset.sort_order != sort_order:
+                preset.sort_order = sort_order
+                preset.updated_at = now
+                changed.append(preset)
+        if changed:
+            EarnPreset.objects.bulk_update(changed, ["sort_order", "updated_at"])
+            _presets_changed(user)
+    return len(changed)
+
+
+def move_preset(user, preset_id, direction):
+    order = list(
+        EarnPreset.objects.filter(user=user).order_by("sort_order", "label").values_list("pk", flat=True)
+    )
+    if preset_id not in order:
+        raise ValueError("Preset not found.")
+    index = order.index(preset_id)
+    target = index - 1 if direction == "up" else index + 1
+    if 0 <= target < len(order):
+        order[index], order[target] = order[target], order[index]
+    return reorder_presets(user, order)
+
+
+def bulk_update_presets(user, preset_ids, action):
+    if action not in PRESET_BULK_ACTIONS:
+        raise ValueError("Unknown preset action.")
+    presets = EarnPreset.objects.filter(user=user, pk__in=[int(preset_id) for preset_id in preset_ids])
+    with transaction.atomic():
+        if action == "delete":
+            count, _ = presets.delete()
+        else:
+            count = presets.update(is_active=action == "activate", updated_at=timezone.now())
+        if count:
+            _presets_changed(user)
+    return count
+
+
+def encode_log_cursor(entry):
+    raw = f"{entry.timestamp.isoformat()}|{entry.id}"
+    return urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_log_cursor(cursor):
+    try:
+        raw = urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        value, entry_id = raw.rsplit("|", 1)
+        timestamp = parse_datetime(value)
+        entry_id = int(entry_id)
+    except ValueError:
+        timestamp = None
+    if timestamp is None or timezone.is_naive(timestamp):
+        raise ValueError("Invalid log cursor.")
+    return timestamp, entry_id
+
+
+def get_log_page(user, cursor=None, kind=None, category=None, quest_id=None, limit=LOG_PAGE_SIZE):
+    entries = Entry.objects.filter(user=user)
+    if kind:
+        entries = entries.filter(kind=kind)
+    if category:
+        entries = entries.filter(category=category)
+    if quest_id:
+        entries = entries.filter(quest_id=quest_id)
+    if cursor:
+        timestamp, entry_id = decode_log_cursor(cursor)
+        entries = entries.filter(timestamp__lte=timestamp).filter(
+            Q(timestamp__lt=timestamp) | Q(timestamp=timestamp, id__lt=entry_id)
+        )
+    page = list(entries.select_related("quest").order_by("-timestamp", "-id")[: limit + 1])
+    next_cursor = encode_log_cursor(page[limit - 1]) if len(page) > limit else None
+    return page[:limit], next_cursor
+
+
+SYNC_MAX_EVENTS = 200
+SYNC_EVENT_ID_LENGTH = Entry._meta.get_field("client_event_id").max_length
+SYNC_MAX_AGE = timedelta(days=7)
+SYNC_CLOCK_SKEW = timedelta(minutes=5)
+
+
+def _event_timestamp(value, now):
+    if not value:
+        return now
+    timestamp = parse_datetime(str(value))
+    if timestamp is None:
+        raise ValueError("Invalid event timestamp.")
+    if timezone.is_naive(timestamp):
+        timestamp = timezone.make_aware(timestamp)
+    if timestamp > now + SYNC_CLOCK_SKEW:
+        raise ValueError("Event timestamp is in the future.")
+    if timestamp > now:
+        return now
+    if timestamp < now - SYNC_MAX_AGE:
+        raise ValueError("Event is too old to sync.")
+    return timestamp
+
+
+def _int_field(event, field):
+    try:
+        return int(event.get(field))
+    except (TypeError, ValueError):
+        raise ValueError(f"Event is missing a valid {field}.") from None
+
+
+def _event_id(event):
+    value = event.get("id")
+    if isinstance(value, str) and 0 < len(value) <= SYNC_EVENT_ID_LENGTH:
+        return value
+    return None
+
+
+def sync_events(user, events, snapshot=None):
+    if len(events) > SYNC_MAX_EVENTS:
+        raise ValueError(f"At most {SYNC_MAX_EVENTS} events can be synced at once.")
+    now = timezone.now()
+    event_ids = [_event_id(event) for event in events]
+    preset_ids = {event.get("preset_id") for event in events if event.get("type") == "earn"}
+    quest_ids = {event.get("quest_id") for event in events if event.get("type") == "quest_complete"}
+    results = []
+    entries = []
+    with transaction.atomic():
+        snapshot = _locked_snapshot(user, snapshot)
+        seen = set(
+            Entry.objects.filter(user=user, client_event_id__in=[event_id for event_id in event_ids if event_id])
+            .values_list("client_event_id", flat=True)
+        )
+        presets = user.earnpreset_set.in_bulk([preset_id for preset_id in preset_ids if str(preset_id).isdigit()])
+        quests = {
+            quest.id: quest
+            for quest in Quest.objects.filter(
+                Q(status=Quest.Status.ACTIVE) | Q(id__in=[quest_id for quest_id in quest_ids if str(quest_id).isdigit()]),
+                user=user,
+            )
+        }
+        active_quest = next((quest for quest in quests.values() if quest.status == Quest.Status.ACTIVE), None)
+        days = {
+            row["day"]: row
+            for row in DailyLedger.objects.filter(user=user, day__gte=local_day(now - SYNC_MAX_AGE)).values(
+                "day", "earned", "spent"
+            )
+        }
+        balance_left = snapshot.balance
+        minutes_by_quest = {}
+        completed_ids = set()
+        for event_id, event in zip(event_ids, events):
+            if event_id is None:
+                error = f"Event id must be a string of 1 to {SYNC_EVENT_ID_LENGTH} characters."
+                results.append({"id": event.get("id"), "status": "rejected", "error": error})
+                continue
+            if event_id in seen:
+                results.append({"id": event_id, "status": "duplicate"})
+                continue
+            try:
+                timestamp = _event_timestamp(event.get("timestamp"), now)
+                day = days.setdefault(local_day(timestamp), {"earned": 0, "spent": 0})
+                kind = event.get("type")
+                if kind == "earn":
+                    preset = presets.get(_int_field(event, "preset_id"))
+                    if not preset:
+                        raise ValueError("Preset not found.")
+                    if day["earned"] + preset.ap > snapshot.settings.daily_earn_cap:
+                        raise ValueError("Daily AP cap reached.")
+                    entry = Entry(
+                        kind=Entry.Kind.EARN,
+                        label=preset.label,
+                        category=preset.category,
+                        ap=preset.ap,
+                    )
+                    day["earned"] += preset.ap
+                    balance_left += preset.ap
+                elif kind == "spend":
+                    cost = _int_field(event, "cost")
+                    if cost not in SPEND_COSTS:
+                        raise ValueError("Spend amount must be 10, 18, or 30 AP.")
+                    if not active_quest:
+                        raise ValueError("Select an active quest before spending AP.")
+                    if day["earned"] - day["spent"] < snapshot.settings.unlock_net_ap_today:
+                        raise ValueError("OSRS spending locked until your net AP today meets the unlock threshold.")
+                    if is_saturday_locked_now(user, now=timezone.localtime(timestamp), snapshot=snapshot):
+                        raise ValueError("OSRS spending is locked until the Saturday unlock time.")
+                    if balance_left < cost:
+                        raise ValueError("Insufficient AP balance.")
+                    entry = Entry(
+                        kind=Entry.Kind.SPEND,
+                        label="Quest session",
+                        category=Entry.Category.OSRS,
+                        ap=cost,
+                        quest=active_quest,
+                        minutes=SPEND_COSTS[cost],
+                    )
+                    day["spent"] += cost
+                    balance_left -= cost
+                    minutes_by_quest[active_quest.id] = minutes_by_quest.get(active_quest.id, 0) + entry.minutes
+                elif kind == "quest_complete":
+                    quest = quests.get(_int_field(event, "quest_id"))
+                    if not quest:
+                        raise ValueError("Quest not found.")
+                    entry = Entry(
+                        kind=Entry.Kind.QUEST_COMPLETE,
+                        label="Quest completed",
+                        category=Entry.Category.OSRS,
+                        ap=0,
+                        quest=quest,
+                    )
+                    completed_ids.add(quest.id)
+                    if active_quest and active_quest.id == quest.id:
+                        active_quest = None
+                else:
+                    raise ValueError("Unknown event type.")
+            except ValueError as exc:
+                results.append({"id": event_id, "status": "rejected", "error": str(exc)})
+                continue
+            entry.user = user
+            entry.timestamp = timestamp
+            entry.client_event_id = event_id
+            entries.append(entry)
+            seen.add(event_id)
+            results.append({"id": event_id, "status": "accepted"})
+        if entries:
+            Entry.objects.bulk_create(entries)
+            for quest_id, minutes in minutes_by_quest.items():
+                Quest.objects.filter(pk=quest_id).update(minutes_logged=F("minutes_logged") + minutes, updated_at=now)
+            if completed_ids:
+                Quest.objects.filter(pk__in=completed_ids).update(status=Quest.Status.COMPLETED, updated_at=now)
+                for quest_id in completed_ids:
+                    enqueue("tracker.refresh_quest", unique=True, quest_id=quest_id)
+            versions = ("quest_version",) if minutes_by_quest or completed_ids else ()
+            record_entries(user, entries, versions=versions)
+            apply_progress(user, entries)
+    snapshot.apply(entries)
+    return results, entries
@@ -1,8 +1,11 @@
 from django.contrib.auth import get_user_model
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
-from .models import EarnPreset, UserSettings
+from .cache import invalidate_presets, invalidate_settings, invalidate_user
+from .ledger import bump_versions
+from .models import EarnPreset, Quest, UserProgress, UserSettings
+from .progress import rebuild_progress
 
 User = get_user_model()
 
@@ -23,7 +26,7 @@ DEFAULT_PRESETS = [
 
 
 def ensure_user_defaults(user):
-    UserSettings.objects.get_or_create(user=user)
+    user.usersettings, _ = UserSettings.objects.get_or_create(user=user)
     if not EarnPreset.objects.filter(user=user).exists():
         presets = [
             EarnPreset(
@@ -37,6 +40,10 @@ def ensure_user_defaults(user):
             for label, category, ap, icon_key, sort_order in DEFAULT_PRESETS
         ]
         EarnPreset.objects.bulk_create(presets)
+        invalidate_presets(user.pk)
+        bump_versions(user.pk, "preset_version")
+    if not UserProgress.objects.filter(user=user).exists():
+        rebuild_progress(user)
 
 
 @receiver(post_save, sender=User)
@@ -44,3 +51,35 @@ def create_user_defaults(sender, instance, created, **kwargs):
     if not created:
         return
     ensure_user_defaults(instance)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def clear_cached_user(sender, instance, **kwargs):
+    invalidate_user(instance.username)
+
+
+@receiver(post_save, sender=UserSettings)
+@receiver(post_delete, sender=UserSettings)
+def clear_cached_settings(sender, instance, **kwargs):
+    invalidate_settings(instance.user_id)
+    bump_versions(instance.user_id, "settings_version")
+
+
+@receiver(post_save, sender=EarnPreset)
+@receiver(post_delete, sender=EarnPreset)
+def clear_cached_presets(sender, instance, **kwargs):
+    invalidate_presets(instance.user_id)
+    bump_versions(instance.user_id, "preset_version")
+
+
+@receiver(post_save, sender=Quest)
+def bump_quest_version(sender, instance, **kwargs):
+    renamed = instance.name != getattr(instance, "_loaded_name", instance.name)
+    bump_versions(instance.user_id, "quest_version", *(("history_version",) if renamed else ()))
+    instance._loaded_name = instance.name
+
+
+@receiver(post_delete, sender=Quest)
+def bump_quest_history_version(sender, instance, **kwargs):
+    bump_versions(instance.user_id, "quest_version", "history_version")
@@ -0,0 +1,226 @@
+(() => {
+    const LOG_LIMIT = 50;
+    const script = document.currentScript;
+
+    function csrfToken(form) {
+        const input = form.querySelector('input[name="csrfmiddlewaretoken"]');
+        return input ? input.value : '';
+    }
+
+    function showMessage(text, level) {
+        const container = document.querySelector('main.container');
+        let box = container.querySelector('.messages');
+        if (!box) {
+            box = document.createElement('div');
+            box.className = 'messages';
+            container.prepend(box);
+        }
+        box.innerHTML = '';
+        const message = document.createElement('div');
+        message.className = `message ${level}`;
+        message.textContent = text;
+        box.appendChild(message);
+    }
+
+    function setStat(name, value) {
+        const node = document.querySelector(`[data-stat="${name}"]`);
+        if (node) {
+            node.textContent = value;
+        }
+    }
+
+    function applyUnlock(unlocked) {
+        const tile = document.querySelector('[data-unlock-tile]');
+        if (!tile) {
+            return;
+        }
+        const icon = tile.querySelector('img');
+        icon.src = unlocked ? tile.dataset.unlockedIcon : tile.dataset.lockedIcon;
+        icon.alt = unlocked ? 'Unlocked' : 'Locked';
+        tile.querySelector('.tile-value').textContent = unlocked ? 'Unlocked' : 'Locked';
+    }
+
+    function applySpendOptions(options) {
+        options.forEach((option) => {
+            const form = document.querySelector(`form[data-spend-cost="${option.cost}"]`);
+            if (!form) {
+                return;
+            }
+            form.querySelector('button').disabled = !option.enabled;
+            const note = form.querySelector('.tile-note');
+            note.textContent = option.reason;
+            note.hidden = option.enabled;
+        });
+    }
+
+    function prependEntry(log, entry) {
+        const placeholder = log.querySelector(':scope > .muted');
+        if (placeholder) {
+            placeholder.remove();
+        }
+        log.insertAdjacentHTML('afterbegin', entry.html);
+    }
+
+    function applyLog(state) {
+        const log = document.querySelector('[data-activity-log]');
+        if (!log) {
+            return;
+        }
+        if (state.removed_entry_id) {
+            const card = log.querySelector(`[data-entry-id="${state.removed_entry_id}"]`);
+            if (card) {
+                card.remove();
+            }
+        }
+        const entries = state.entries || (state.entry ? [state.entry] : []);
+        entries.slice().reverse().forEach((entry) => prependEntry(log, entry));
+        const cards = log.querySelectorAll(':scope > .card');
+        for (let index = LOG_LIMIT; index < cards.length; index += 1) {
+            cards[index].remove();
+        }
+    }
+
+    function applyState(state) {
+        setStat('balance', state.balance);
+        setStat('today_earned', state.today.earned);
+        setStat('today_spent', state.today.spent);
+        setStat('today_net', state.today.net);
+        applyUnlock(state.unlocked_today);
+        applySpendOptions(state.spend_options);
+        applyLog(state);
+        if (state.quest_panel) {
+            const panel = document.querySelector('[data-quest-panel]');
+            if (panel) {
+                panel.outerHTML = state.quest_panel.html;
+            }
+            setStat('quest_progress', `${state.quest_panel.completed} / ${state.quest_panel.total}`);
+        } else if (state.active_quest) {
+            const minutes = document.querySelector('[data-quest-minutes]');
+            if (minutes) {
+                minutes.textContent = state.active_quest.minutes_logged;
+            }
+        }
+    }
+
+    function apiUrl(form) {
+        if (form.dataset.api) {
+            return form.dataset.api;
+        }
+        if (form.dataset.apiTemplate) {
+            const select = form.querySelector('select[name="quest_id"]');
+            return select && select.value ? form.dataset.apiTemplate.replace('/0/', `/${select.value}/`) : null;
+        }
+        return null;
+    }
+
+    async function submitAction(form) {
+        const url = apiUrl(form);
+        if (!url) {
+            return;
+        }
+        const response = await fetch(url, {
+            method: 'POST',
+            body: new FormData(form),
+            headers: { 'X-CSRFToken': csrfToken(form), Accept: 'application/json' },
+            credentials: 'same-origin',
+        });
+        const state = await response.json();
+        if (state.queued) {
+            showMessage(state.message, 'info');
+            return;
+        }
+        if (!state.ok) {
+            showMessage(state.error, 'error');
+            return;
+        }
+        applyState(state);
+        if (state.message) {
+            showMessage(state.message, 'success');
+        }
+    }
+
+    document.addEventListener('submit', (event) => {
+        const form = event.target;
+        if (!form.dataset.api && !form.dataset.apiTemplate) {
+            return;
+        }
+        event.preventDefault();
+        submitAction(form).catch(() => {
+            if (form.dataset.actionTemplate) {
+                const select = form.querySelector('select[name="quest_id"]');
+                if (!select || !select.value) {
+                    return;
+                }
+                form.action = form.dataset.actionTemplate.replace('/0/', `/${select.value}/`);
+            }
+            form.submit();
+        });
+    });
+
+    function questOption(quest, selectedId) {
+        const option = document.createElement('option');
+        option.value = quest.id;
+        option.textContent = quest.status === 'completed' ? `${quest.name} (completed)` : quest.name;
+        option.selected = String(quest.id) === selectedId;
+        return option;
+    }
+
+    async function searchQuests(input) {
+        const select = input.form.querySelector('select[name="quest_id"]');
+        const url = new URL(input.dataset.questSearch, window.location.href);
+        url.searchParams.set('q', input.value);
+        const response = await fetch(url, { headers: { Accept: 'application/json' }, credentials: 'same-origin' });
+        if (!response.ok || !select) {
+            return;
+        }
+        const { quests } = await response.json();
+        const selectedId = select.value;
+        const placeholder = select.querySelector('option[value=""]');
+        select.replaceChildren(...[placeholder, ...quests.map((quest) => questOption(quest, selectedId))].filter(Boolean));
+    }
+
+    let searchTimer = null;
+    document.addEventListener('input', (event) => {
+        const input = event.target.closest('[data-quest-search]');
+        if (!input) {
+            return;
+        }
+        clearTimeout(searchTimer);
+        searchTimer = setTimeout(() => searchQuests(input).catch(() => null), 200);
+    });
+
+    function flushQueue() {
+        if (navigator.serviceWorker && navigator.serviceWorker.controller) {
+            navigator.serviceWorker.controller.postMessage({ type: 'flush' });
+        }
+    }
+
+    function handleSynced(state) {
+        applyState(state);
+        const accepted = state.results.filter((result) => result.status === 'accepted').length;
+        const rejected = state.results.filter((result) => result.status === 'rejected');
+        if (rejected.length) {
+            showMessage(`Synced ${accepted} queued action(s); ${rejected.length} rejected: ${rejected[0].error}`, 'error');
+        } else if (accepted) {
+            showMessage(`Synced ${accepted} queued action(s).`, 'success');
+        }
+    }
+
+    if ('serviceWorker' in navigator && script && script.dataset.serviceWorker) {
+        navigator.serviceWorker.register(script.dataset.serviceWorker, { scope: '/' }).catch(() => null);
+        navigator.serviceWorker.addEventListener('message', (event) => {
+            if (event.data && event.data.type === 'synced') {
+                handleSynced(event.data.state);
+            }
+        });
+        navigator.serviceWorker.ready.then(flushQueue);
+        window.addEventListener('online', flushQueue);
+    }
+
+    document.addEventListener('click', (event) => {
+        const tile = event.target.closest('form.tile-button');
+        if (tile && !tile.querySelector('button') && tile.dataset.api) {
+            tile.requestSubmit();
+        }
+    });
+})();
@@ -0,0 +1,43 @@
+(() => {
+    const list = document.querySelector('[data-log-list]');
+    const more = document.querySelector('[data-log-more]');
+    if (!list || !more || !('IntersectionObserver' in window)) {
+        return;
+    }
+    let loading = false;
+
+    async function loadMore() {
+        if (loading) {
+            return;
+        }
+        loading = true;
+        try {
+            const response = await fetch(more.dataset.logMore, { headers: { Accept: 'application/json' } });
+            if (!response.ok) {
+                return;
+            }
+            const page = await response.json();
+            page.entries.forEach((entry) => list.insertAdjacentHTML('beforeend', entry.html));
+            if (!page.next_cursor) {
+                observer.disconnect();
+                more.parentElement.remove();
+                return;
+            }
+            const api = new URL(more.dataset.logMore, window.location.href);
+            const link = new URL(more.href, window.location.href);
+            api.searchParams.set('cursor', page.next_cursor);
+            link.searchParams.set('cursor', page.next_cursor);
+            more.dataset.logMore = api.pathname + api.search;
+            more.href = link.pathname + link.search;
+        } finally {
+            loading = false;
+        }
+    }
+
+    const observer = new IntersectionObserver((records) => {
+        if (records.some((record) => record.isIntersecting)) {
+            loadMore();
+        }
+    }, { rootMargin: '400px' });
+    observer.observe(more);
+})();
@@ -0,0 +1,53 @@
+(() => {
+    const list = document.querySelector('[data-preset-list]');
+    if (!list) {
+        return;
+    }
+    let dragging = null;
+
+    function csrfToken() {
+        const input = document.querySelector('input[name="csrfmiddlewaretoken"]');
+        return input ? input.value : '';
+    }
+
+    async function saveOrder() {
+        const order = [...list.querySelectorAll('[data-preset-id]')].map((card) => Number(card.dataset.presetId));
+        const response = await fetch(list.dataset.reorderUrl, {
+            method: 'POST',
+            credentials: 'same-origin',
+            headers: { 'Content-Type': 'application/json', 'X-CSRFToken': csrfToken() },
+            body: JSON.stringify({ order }),
+        });
+        if (!response.ok) {
+            window.location.reload();
+        }
+    }
+
+    list.addEventListener('dragstart', (event) => {
+        dragging = event.target.closest('[data-preset-id]');
+        if (dragging) {
+            event.dataTransfer.effectAllowed = 'move';
+            dragging.classList.add('dragging');
+        }
+    });
+
+    list.addEventListener('dragover', (event) => {
+        const target = event.target.closest('[data-preset-id]');
+        if (!dragging || !target || target === dragging) {
+            return;
+        }
+        event.preventDefault();
+        const box = target.getBoundingClientRect();
+        const after = event.clientY > box.top + box.height / 2;
+        target.parentNode.insertBefore(dragging, after ? target.nextSibling : target);
+    });
+
+    list.addEventListener('dragend', () => {
+        if (!dragging) {
+            return;
+        }
+        dragging.classList.remove('dragging');
+        dragging = null;
+        saveOrder().catch(() => window.location.reload());
+    });
+})();
@@ -0,0 +1,194 @@
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q, Sum
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .archive import month_start, next_month
+from .ledger import get_user_ledger
+from .models import Entry, EntryArchive, MonthlySummary, Quest
+
+PERIODS = {"day": TruncDay, "week": TruncWeek, "month": TruncMonth}
+EARNED = Sum("ap", filter=Q(kind=Entry.Kind.EARN), default=0)
+SPENT = Sum("ap", filter=Q(kind=Entry.Kind.SPEND), default=0)
+MINUTES = Sum("minutes", filter=Q(kind=Entry.Kind.SPEND), default=0)
+
+
+def period_start(day, period):
+    if period == "week":
+        return day - timedelta(days=day.weekday())
+    if period == "month":
+        return day.replace(day=1)
+    return day
+
+
+def _entries(model, user, start, end):
+    tz = timezone.get_current_timezone()
+    lower = timezone.make_aware(datetime.combine(start, time.min), tz)
+    upper = timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min), tz)
+    return model.objects.filter(user=user, timestamp__gte=lower, timestamp__lt=upper)
+
+
+def _series(entries, period):
+    trunc = PERIODS[period]("timestamp", tzinfo=timezone.get_current_timezone())
+    rows = (
+        entries.annotate(bucket=trunc)
+        .values("bucket")
+        .annotate(earned=EARNED, spent=SPENT, minutes=MINUTES)
+        .order_by("bucket")
+    )
+    return [
+        {
+            "period": timezone.localtime(row["bucket"]).date() if isinstance(row["bucket"], datetime) else row["bucket"],
+            "earned": row["earned"],
+            "spent": row["spent"],
+            "minutes": row["minutes"],
+        }
+        for row in rows
+    ]
+
+
+def _categories(entries):
+    rows = entries.values("category").annotate(earned=EARNED, spent=SPENT).order_by()
+    return {row["category"]: {"earned": row["earned"], "spent": row["spent"]} for row in rows}
+
+
+def _quests(entries):
+    rows = (
+        entries.filter(kind=Entry.Kind.SPEND, quest__isnull=False)
+        .values("quest_id", "quest__name")
+        .annotate(minutes=MINUTES)
+        .order_by()
+    )
+    return {row["quest_id"]: {"name": row["quest__name"], "minutes": row["minutes"]} for row in rows}
+
+
+def _aggregate(model, user, start, end, period):
+    entries = _entries(model, user, start, end)
+    return {
+        "series": _series(entries, period),
+        "categories": _categories(entries),
+        "quests": _quests(entries),
+    }
+
+
+def _summarized(user, months, period):
+    series = {}
+    categories = {}
+    minutes = {}
+    for summary in MonthlySummary.objects.filter(user=user, month__in=months):
+        for day, values in summary.days.items():
+            bucket = period_start(parse_date(day), period)
+            row = series.setdefault(bucket, {"period": bucket, "earned": 0, "spent": 0, "minutes": 0})
+            for field in ("earned", "spent", "minutes"):
+                row[field] += values[field]
+        for name, totals in summary.categories.items():
+            merged = categories.setdefault(name, {"earned": 0, "spent": 0})
+            merged["earned"] += totals["earned"]
+            merged["spent"] += totals["spent"]
+        for quest_id, quest_minutes in summary.quests.items():
+            minutes[int(quest_id)] = minutes.get(int(quest_id), 0) + quest_minutes
+    names = Quest.objects.filter(user=user, pk__in=minutes).values_list("pk", "name") if minutes else []
+    return {
+        "series": [series[key] for key in sorted(series)],
+        "categories": categories,
+        "quests": {pk: {"name": name, "minutes": minutes[pk]} for pk, name in names},
+    }
+
+
+def _archived(user, start, end, period):
+    parts = []
+    months = []
+    month = month_start(start)
+    while month <= end:
+        last = next_month(month) - timedelta(days=1)
+        if start <= month and last <= end:
+            months.append(month)
+        else:
+            parts.append(_aggregate(EntryArchive, user, max(start, month), min(end, last), period))
+        month = next_month(month)
+    if months:
+        parts.append(_summarized(user, months, period))
+    return parts
+
+
+def _compute(user, start, end, period, archived_before=None):
+    parts = [_aggregate(Entry, user, start, end, period)]
+    if archived_before and start < archived_before:
+        parts += _archived(user, start, min(end, archived_before - timedelta(days=1)), period)
+    if len(parts) == 1:
+        return parts[0]
+    series, categories, quests = _merge(parts)
+    return {"series": [series[key] for key in sorted(series)], "categories": categories, "quests": quests}
+
+
+def _closed_key(user, start, end, period, history_version):
+    return f"tracker:stats:{user.pk}:{period}:{start.isoformat()}:{end.isoformat()}:{history_version}"
+
+
+def _merge(parts):
+    series = {}
+    categories = {}
+    quests = {}
+    for part in parts:
+        for row in part["series"]:
+            bucket = series.setdefault(row["period"], {"period": row["period"], "earned": 0, "spent": 0, "minutes": 0})
+            for field in ("earned", "spent", "minutes"):
+                bucket[field] += row[field]
+        for name, totals in part["categories"].items():
+            merged = categories.setdefault(name, {"earned": 0, "spent": 0})
+            merged["earned"] += totals["earned"]
+            merged["spent"] += totals["spent"]
+        for quest_id, totals in part["quests"].items():
+            merged = quests.setdefault(quest_id, {"name": totals["name"], "minutes": 0})
+            merged["minutes"] += totals["minutes"]
+    return series, categories, quests
+
+
+def get_stats(user, start, end, period="day"):
+    if period not in PERIODS:
+        raise ValueError(f"Unknown stats period {period!r}.")
+    if start > end:
+        raise ValueError("Start date must be before end date.")
+    current = period_start(timezone.localdate(), period)
+    ledger = get_user_ledger(user)
+    parts = []
+    closed_end = min(end, current - timedelta(days=1))
+    if start <= closed_end:
+        key = _closed_key(user, start, closed_end, period, ledger.history_version)
+        closed = cache.get(key)
+        if closed is None:
+            closed = _compute(user, start, closed_end, period, ledger.archived_before)
+            cache.set(key, closed, getattr(settings, "TRACKER_STATS_TIMEOUT", 3600))
+        parts.append(closed)
+    if end >= current:
+        parts.append(_compute(user, max(start, current), end, period, ledger.archived_before))
+    series, categories, quests = _merge(parts)
+
+    for row in series.values():
+        row["net"] = row["earned"] - row["spent"]
+    total_earned = sum(totals["earned"] for totals in categories.values())
+    category_rows = [
+        {
+            "category": name,
+            "earned": totals["earned"],
+            "spent": totals["spent"],
+            "share": round(totals["earned"] / total_earned, 4) if total_earned else 0.0,
+        }
+        for name, totals in sorted(categories.items(), key=lambda item: -item[1]["earned"])
+    ]
+    quest_rows = [
+        {"quest_id": quest_id, "name": totals["name"], "minutes": totals["minutes"]}
+        for quest_id, totals in sorted(quests.items(), key=lambda item: -item[1]["minutes"])
+    ]
+    return {
+        "start": start,
+        "end": end,
+        "period": period,
+        "series": [series[key] for key in sorted(series)],
+        "categories": category_rows,
+        "quests": quest_rows,
+    }
@@ -0,0 +1,204 @@
+import os
+import socket
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Count, F
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .archive import archive_horizon, archive_user
+from .imports import refresh_quest_minutes
+from .ledger import bump_versions, check_daily_ledger, rebuild_daily_ledger, rebuild_user_ledger
+from .metrics import record_task
+from .models import Quest, Task
+from .progress import rebuild_progress, refresh_progress
+from .reports import get_weekly_reports, last_complete_week
+
+TASKS = {}
+CLAIM_CANDIDATES = 5
+
+
+def task(name):
+    def register(func):
+        TASKS[name] = func
+        return func
+
+    return register
+
+
+def enqueue(name, delay=0, run_at=None, max_attempts=None, unique=False, **kwargs):
+    if name not in TASKS:
+        raise ValueError(f"Unknown task {name!r}.")
+    if unique and Task.objects.filter(name=name, kwargs=kwargs, status=Task.Status.QUEUED).exists():
+        return None
+    return Task.objects.create(
+        name=name,
+        kwargs=kwargs,
+        run_at=run_at or timezone.now() + timedelta(seconds=delay),
+        max_attempts=max_attempts or settings.TRACKER_TASK_MAX_ATTEMPTS,
+    )
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def retry_delay(attempts):
+    return settings.TRACKER_TASK_RETRY_SECONDS * 2 ** max(attempts - 1, 0)
+
+
+def queue_depth():
+    rows = Task.objects.values("status").annotate(count=Count("id")).order_by()
+    return {row["status"]: row["count"] for row in rows}
+
+
+def requeue_stale(now=None):
+    now = now or timezone.now()
+    stale = Task.objects.filter(
+        status=Task.Status.RUNNING,
+        locked_at__lt=now - timedelta(seconds=settings.TRACKER_TASK_TIMEOUT),
+    )
+    error = "Worker lock expired."
+    failed = stale.filter(attempts__gte=F("max_attempts")).update(
+        status=Task.Status.FAILED, locked_by="", locked_at=None, last_error=error, finished_at=now
+    )
+    requeued = stale.update(status=Task.Status.QUEUED, locked_by="", locked_at=None, last_error=error)
+    return requeued, failed
+
+
+def prune_finished(now=None):
+    cutoff = (now or timezone.now()) - timedelta(days=settings.TRACKER_TASK_RETENTION_DAYS)
+    deleted, _ = Task.objects.filter(status=Task.Status.DONE, finished_at__lt=cutoff).delete()
+    return deleted
+
+
+def _lock(pk, worker, now):
+    return Task.objects.filter(pk=pk, status=Task.Status.QUEUED).update(
+        status=Task.Status.RUNNING,
+        locked_by=worker,
+        locked_at=now,
+        attempts=F("attempts") + 1,
+    )
+
+
+def claim(worker):
+    now = timezone.now()
+    due = Task.objects.filter(status=Task.Status.QUEUED, run_at__lte=now).order_by("run_at", "id")
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            pk = due.select_for_update(skip_locked=True).values_list("pk", flat=True).first()
+            if pk is None or not _lock(pk, worker, now):
+                return None
+    else:
+        for pk in due.values_list("pk", flat=True)[:CLAIM_CANDIDATES]:
+            if _lock(pk, worker, now):
+                break
+        else:
+            return None
+    return Task.objects.get(pk=pk)
+
+
+def _beat(pk, worker, stop):
+    # A third of the timeout leaves room for a couple of missed beats before requeue_stale fires.
+    try:
+        while not stop.wait(settings.TRACKER_TASK_TIMEOUT / 3):
+            try:
+                Task.objects.filter(pk=pk, status=Task.Status.RUNNING, locked_by=worker).update(locked_at=timezone.now())
+            except DatabaseError:
+                pass
+    finally:
+        connection.close()
+
+
+@contextmanager
+def heartbeat(task, worker):
+    stop = threading.Event()
+    thread = threading.Thread(target=_beat, args=(task.pk, worker, stop), daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def run_task(task, worker):
+    handler = TASKS.get(task.name)
+    started = time.perf_counter()
+    try:
+        if handler is None:
+            raise LookupError(f"No handler registered for task {task.name!r}.")
+        with heartbeat(task, worker):
+            handler(**task.kwargs)
+    except Exception:
+        elapsed = time.perf_counter() - started
+        retry = handler is not None and task.attempts < task.max_attempts
+        changes = {"last_error": traceback.format_exc(), "duration": elapsed, "locked_by": "", "locked_at": None}
+        if retry:
+            changes.update(status=Task.Status.QUEUED, run_at=timezone.now() + timedelta(seconds=retry_delay(task.attempts)))
+        else:
+            changes.update(status=Task.Status.FAILED, finished_at=timezone.now())
+        Task.objects.filter(pk=task.pk, locked_by=worker).update(**changes)
+        record_task(task.name, "retried" if retry else "failed", elapsed)
+        return False
+    elapsed = time.perf_counter() - started
+    Task.objects.filter(pk=task.pk, locked_by=worker).update(
+        status=Task.Status.DONE,
+        duration=elapsed,
+        finished_at=timezone.now(),
+        locked_by="",
+        locked_at=None,
+        last_error="",
+    )
+    record_task(task.name, "done", elapsed)
+    return True
+
+
+def _user(user_id):
+    return get_user_model().objects.get(pk=user_id)
+
+
+@task("tracker.rebuild_ledgers")
+def rebuild_ledgers(user_id):
+    user = _user(user_id)
+    rebuild_user_ledger(user)
+    rebuild_daily_ledger(user)
+    rebuild_progress(user)
+
+
+@task("tracker.check_ledgers")
+def check_ledgers(user_id):
+    user = _user(user_id)
+    if check_daily_ledger(user):
+        rebuild_daily_ledger(user)
+
+
+@task("tracker.archive_entries")
+def archive_entries(days=None):
+    before = archive_horizon(days)
+    for user in get_user_model().objects.order_by("id").iterator():
+        archive_user(user, before)
+
+
+@task("tracker.refresh_quest")
+def refresh_quest(quest_id):
+    quest = Quest.objects.filter(pk=quest_id).values("user_id").first()
+    if quest and refresh_quest_minutes([quest_id]):
+        bump_versions(quest["user_id"], "quest_version")
+
+
+@task("tracker.settings_saved")
+def settings_saved(user_id):
+    refresh_progress(_user(user_id))
+
+
+@task("tracker.weekly_report")
+def weekly_report(week=None):
+    get_weekly_reports(parse_date(week) if week else last_complete_week())
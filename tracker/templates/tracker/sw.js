@@ -0,0 +1,110 @@
+const SYNC_URL = '{% url "api_sync" %}';
+const SYNC_TAG = 'tracker-sync';
+const DB_NAME = 'tracker-sync-queue';
+
+function actionPattern(url) {
+    const escaped = url.replace(/[.*+?^${}()|[\]\\]/g, '\\$&');
+    return new RegExp(`^${escaped.replace('/0/', '/(\\d+)/')}$`);
+}
+
+const ACTIONS = [
+    [actionPattern('{% url "api_earn_preset" 0 %}'), (match) => ({ type: 'earn', preset_id: Number(match[1]) })],
+    [actionPattern('{% url "api_spend" 0 %}'), (match) => ({ type: 'spend', cost: Number(match[1]) })],
+    [actionPattern('{% url "api_complete_quest" 0 %}'), (match) => ({ type: 'quest_complete', quest_id: Number(match[1]) })],
+];
+
+function openDb() {
+    return new Promise((resolve, reject) => {
+        const request = indexedDB.open(DB_NAME, 1);
+        request.onupgradeneeded = () => {
+            request.result.createObjectStore('events', { keyPath: 'id' });
+            request.result.createObjectStore('meta');
+        };
+        request.onsuccess = () => resolve(request.result);
+        request.onerror = () => reject(request.error);
+    });
+}
+
+async function withStore(name, mode, callback) {
+    const db = await openDb();
+    return new Promise((resolve, reject) => {
+        const transaction = db.transaction(name, mode);
+        const result = callback(transaction.objectStore(name));
+        transaction.oncomplete = () => resolve(result && 'result' in result ? result.result : undefined);
+        transaction.onerror = () => reject(transaction.error);
+    });
+}
+
+function matchAction(pathname) {
+    for (const [pattern, build] of ACTIONS) {
+        const match = pathname.match(pattern);
+        if (match) {
+            return build(match);
+        }
+    }
+    return null;
+}
+
+async function queueEvent(action, csrfToken) {
+    const event = { id: self.crypto.randomUUID(), timestamp: new Date().toISOString(), ...action };
+    await withStore('events', 'readwrite', (store) => store.put(event));
+    if (csrfToken) {
+        await withStore('meta', 'readwrite', (store) => store.put(csrfToken, 'csrf'));
+    }
+    if (self.registration.sync) {
+        await self.registration.sync.register(SYNC_TAG).catch(() => null);
+    }
+    const body = JSON.stringify({ ok: false, queued: true, message: 'Offline: action queued and will sync when you reconnect.' });
+    return new Response(body, { status: 202, headers: { 'Content-Type': 'application/json' } });
+}
+
+async function flush() {
+    const events = await withStore('events', 'readonly', (store) => store.getAll());
+    if (!events || !events.length) {
+        return;
+    }
+    events.sort((left, right) => left.timestamp.localeCompare(right.timestamp));
+    const csrfToken = await withStore('meta', 'readonly', (store) => store.get('csrf'));
+    const response = await fetch(SYNC_URL, {
+        method: 'POST',
+        credentials: 'same-origin',
+        headers: { 'Content-Type': 'application/json', 'X-CSRFToken': csrfToken || '' },
+        body: JSON.stringify({ events }),
+    });
+    if (!response.ok) {
+        return;
+    }
+    const state = await response.json();
+    await withStore('events', 'readwrite', (store) => state.results.forEach((result) => store.delete(result.id)));
+    const clients = await self.clients.matchAll({ type: 'window' });
+    clients.forEach((client) => client.postMessage({ type: 'synced', state }));
+}
+
+self.addEventListener('install', () => self.skipWaiting());
+
+self.addEventListener('activate', (event) => event.waitUntil(self.clients.claim()));
+
+self.addEventListener('fetch', (event) => {
+    const request = event.request;
+    if (request.method !== 'POST') {
+        return;
+    }
+    const action = matchAction(new URL(request.url).pathname);
+    if (!action) {
+        return;
+    }
+    const csrfToken = request.headers.get('X-CSRFToken');
+    event.respondWith(fetch(request).catch(() => queueEvent(action, csrfToken)));
+});
+
+self.addEventListener('sync', (event) => {
+    if (event.tag === SYNC_TAG) {
+        event.waitUntil(flush());
+    }
+});
+
+self.addEventListener('message', (event) => {
+    if (event.data && event.data.type === 'flush') {
+        event.waitUntil(flush().catch(() => null));
+    }
+});
@@ -0,0 +1,31 @@
+from django import template
+from django.middleware.csrf import get_token
+
+from ..cache import get_fragment
+
+register = template.Library()
+
+
+class FragmentNode(template.Node):
+    def __init__(self, nodelist, name, vary_on):
+        self.nodelist = nodelist
+        self.name = name
+        self.vary_on = vary_on
+
+    def render(self, context):
+        parts = [str(value.resolve(context)) for value in self.vary_on]
+        request = context.get("request")
+        if request is not None:
+            get_token(request)
+            parts.append(request.META.get("CSRF_COOKIE", ""))
+        return get_fragment(self.name.resolve(context), parts, lambda: self.nodelist.render(context))
+
+
+@register.tag("fragment")
+def do_fragment(parser, token):
+    bits = token.split_contents()
+    if len(bits) < 2:
+        raise template.TemplateSyntaxError(f"{bits[0]!r} tag requires at least a fragment name.")
+    nodelist = parser.parse(("endfragment",))
+    parser.delete_first_token()
+    return FragmentNode(nodelist, parser.compile_filter(bits[1]), [parser.compile_filter(bit) for bit in bits[2:]])
@@ -0,0 +1,391 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from unittest import mock
+
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import AsyncClient, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import metrics
+from .async_views import gather_reads
+from .bench import check_budgets, generate_dataset, run_operations
+from .cache import get_active_presets
+from .imports import parse_row
+from .ledger import bump_versions, rebuild_user_ledger
+from .management.commands.bench_asgi import AsyncURLConf
+from .models import Entry, Quest, Task, UserProgress, UserSettings
+from .profiling import ProfilerMiddleware
+from .progress import get_progress
+from .query_plans import explain_queries
+from .routers import ReplicaPinMiddleware
+from .services import balance, create_custom_earn, set_active_quest, spend_ap, sync_events, take_snapshot
+from .signals import ensure_user_defaults
+from .stats import get_stats
+from .tasks import TASKS, claim, enqueue, requeue_stale, run_task
+from .views import get_default_user
+
+
+def make_user(username="tester", **settings):
+    user = get_user_model().objects.create(username=username)
+    ensure_user_defaults(user)
+    UserSettings.objects.filter(user=user).update(**settings)
+    user.usersettings.refresh_from_db()
+    return user
+
+
+class ConcurrentSpendTests(TransactionTestCase):
+    workers = 8
+
+    def setUp(self):
+        cache.clear()
+        self.user = make_user(unlock_net_ap_today=0)
+        quest = Quest.objects.create(user=self.user, name="Concurrency")
+        set_active_quest(self.user, quest.pk)
+        create_custom_earn(self.user, "Seed", Entry.Category.BASE, 35)
+
+    def _spend(self, _):
+        try:
+            spend_ap(self.user, 10)
+            return True
+        except ValueError:
+            return False
+        finally:
+            connection.close()
+
+    def test_parallel_spends_never_overdraw(self):
+        with ThreadPoolExecutor(self.workers) as pool:
+            results = list(pool.map(self._spend, range(self.workers)))
+        spends = Entry.objects.filter(user=self.user, kind=Entry.Kind.SPEND).count()
+        self.assertEqual(results.count(True), spends)
+        self.assertGreater(spends, 0)
+        self.assertLessEqual(spends, 35 // 10)
+        self.assertGreaterEqual(balance(self.user), 0)
+        self.assertEqual(balance(self.user), 35 - 10 * spends)
+        self.assertEqual(rebuild_user_ledger(self.user).balance, balance(self.user))
+
+
+class SyncEventTests(TestCase):
+    def test_rejects_invalid_event_ids_per_event(self):
+        user = make_user()
+        preset = user.earnpreset_set.first()
+        events = [
+            {"id": event_id, "type": "earn", "preset_id": preset.pk}
+            for event_id in ("x" * 65, 123, "", None, "ok-1")
+        ]
+        results, entries = sync_events(user, events)
+        self.assertEqual([result["status"] for result in results], ["rejected"] * 4 + ["accepted"])
+        self.assertEqual([entry.client_event_id for entry in entries], ["ok-1"])
+
+    def test_rejects_timestamps_outside_the_sync_window(self):
+        user = make_user()
+        preset = user.earnpreset_set.first()
+        now = timezone.now()
+        events = [
+            {"id": f"e-{days}", "type": "earn", "preset_id": preset.pk, "timestamp": (now + timedelta(days=days)).isoformat()}
+            for days in (-30, 1, -1)
+        ]
+        results, entries = sync_events(user, events)
+        self.assertEqual([result["status"] for result in results], ["rejected", "rejected", "accepted"])
+        with self.assertRaisesMessage(ValueError, "Timestamp is in the future."):
+            parse_row({"timestamp": (now + timedelta(days=1)).isoformat(), "kind": "earn", "label": "Run", "ap": "5"})
+
+
+class ProgressReadTests(TestCase):
+    def test_reads_roll_the_day_over_without_writing(self):
+        user = make_user()
+        today = timezone.localdate()
+        yesterday = today - timedelta(days=1)
+        UserProgress.objects.filter(user=user).update(day=yesterday, workout_today=True)
+        with CaptureQueriesContext(connection) as context:
+            progress = get_progress(user)
+        self.assertEqual((progress.day, progress.workout_today), (today, False))
+        writes = [query["sql"] for query in context.captured_queries if not query["sql"].startswith("SELECT")]
+        self.assertEqual(writes, [])
+        self.assertEqual(UserProgress.objects.get(user=user).day, yesterday)
+        create_custom_earn(user, "Rollover", Entry.Category.BASE, 5)
+        self.assertEqual(UserProgress.objects.get(user=user).day, today)
+
+
+class SettingsSavedTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client.get(reverse("dashboard"))
+        self.user = get_default_user()
+
+    def _save(self, **changes):
+        data = {
+            "saturday_lock_enabled": "",
+            "saturday_unlock_time": "10:30",
+            "daily_earn_cap": 65,
+            "unlock_net_ap_today": self.user.usersettings.unlock_net_ap_today,
+            **changes,
+        }
+        self.assertEqual(self.client.post(reverse("settings"), data).status_code, 302)
+
+    def test_only_threshold_changes_queue_progress_work(self):
+        self._save(daily_earn_cap=80)
+        self.assertFalse(Task.objects.exists())
+        self._save(unlock_net_ap_today=40)
+        self.assertEqual(list(Task.objects.values_list("name", flat=True)), ["tracker.settings_saved"])
+        self.assertTrue(run_task(claim("test"), "test"))
+        self.assertEqual(UserProgress.objects.get(user=self.user).threshold, 40)
+
+
+class TaskHeartbeatTests(TransactionTestCase):
+    @override_settings(TRACKER_TASK_TIMEOUT=0.3)
+    def test_long_running_task_is_not_requeued(self):
+        requeued = []
+
+        def slow():
+            time.sleep(0.5)
+            requeued.append(requeue_stale())
+
+        with mock.patch.dict(TASKS, {"test.slow": slow}):
+            enqueue("test.slow")
+            self.assertTrue(run_task(claim("test"), "test"))
+        self.assertEqual(requeued, [(0, 0)])
+        self.assertEqual(Task.objects.get().status, Task.Status.DONE)
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        override = override_settings(TRACKER_METRICS_DIR=self.directory, TRACKER_METRICS_TOKEN="scrape")
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_endpoints_require_token_or_staff(self):
+        for name in ("metrics", "cache_stats"):
+            with self.subTest(view=name):
+                self.assertEqual(self.client.get(reverse(name)).status_code, 403)
+                response = self.client.get(reverse(name), HTTP_AUTHORIZATION="Bearer scrape")
+                self.assertEqual(response.status_code, 200)
+        staff = get_user_model().objects.create_user("staff", password="x", is_staff=True)
+        self.client.force_login(staff)
+        self.assertEqual(self.client.get(reverse("metrics")).status_code, 200)
+
+    def test_collect_drops_files_from_dead_workers(self):
+        dead = metrics.metrics_dir() / "999999999.json"
+        dead.write_text(json.dumps({"views": {"ghost": metrics._empty_view()}, "fragments": {}, "tasks": {}}))
+        views, _, _ = metrics.collect()
+        self.assertNotIn("ghost", views)
+        self.assertFalse(dead.exists())
+
+    def test_cache_stats_include_other_workers(self):
+        other = metrics.metrics_dir() / f"{os.getppid()}.json"
+        other.write_text(json.dumps({"views": {}, "fragments": {"quests": {"hits": 3, "misses": 1}}, "tasks": {}}))
+        response = self.client.get(reverse("cache_stats"), HTTP_AUTHORIZATION="Bearer scrape")
+        self.assertEqual(response.json()["fragments"]["quests"], {"hits": 3, "misses": 1, "hit_rate": 0.75})
+
+
+class ETagTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_etag_changes_with_csrf_cookie(self):
+        self.client.get(reverse("dashboard"))
+        first = self.client.get(reverse("dashboard"))
+        self.assertEqual(self.client.get(reverse("dashboard"), HTTP_IF_NONE_MATCH=first["ETag"]).status_code, 304)
+        self.client.cookies[settings.CSRF_COOKIE_NAME] = "rotated" * 4
+        response = self.client.get(reverse("dashboard"), HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], first["ETag"])
+
+
+class SettingsCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_pages_reload_settings_changed_by_another_worker(self):
+        self.client.get(reverse("dashboard"))
+        user = get_default_user()
+        UserSettings.objects.filter(user=user).update(daily_earn_cap=99, unlock_net_ap_today=1)
+        bump_versions(user.pk, "settings_version")
+        response = self.client.get(reverse("settings"))
+        self.assertEqual(response.context["form"].instance.daily_earn_cap, 99)
+        self.assertEqual(get_default_user().usersettings.unlock_net_ap_today, 1)
+
+    def test_snapshot_reloads_stale_settings(self):
+        self.client.get(reverse("dashboard"))
+        user = get_default_user()
+        UserSettings.objects.filter(user=user).update(daily_earn_cap=99)
+        bump_versions(user.pk, "settings_version")
+        response = self.client.post(reverse("api_earn_preset", args=[get_active_presets(user)[0].pk]))
+        self.assertTrue(response.json()["ok"])
+        self.assertEqual(take_snapshot(get_default_user()).settings.daily_earn_cap, 99)
+
+
+class StatsCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = make_user()
+        self.quest = Quest.objects.create(user=self.user, name="Cook's Assistant")
+        entry = Entry.objects.create(
+            user=self.user, kind=Entry.Kind.SPEND, label="Quest session", ap=10, quest=self.quest, minutes=30
+        )
+        Entry.objects.filter(pk=entry.pk).update(timestamp=timezone.now() - timedelta(days=10))
+        rebuild_user_ledger(self.user)
+        self.end = timezone.localdate() - timedelta(days=2)
+
+    def test_closed_periods_expire(self):
+        with mock.patch.object(cache, "set", wraps=cache.set) as cache_set:
+            get_stats(self.user, self.end - timedelta(days=20), self.end)
+        self.assertEqual(cache_set.call_args.args[2], settings.TRACKER_STATS_TIMEOUT)
+
+    def test_quest_rename_invalidates_closed_periods(self):
+        start = self.end - timedelta(days=20)
+        self.assertEqual(get_stats(self.user, start, self.end)["quests"][0]["name"], "Cook's Assistant")
+        quest = Quest.objects.get(pk=self.quest.pk)
+        quest.name = "Cook's Assistant II"
+        quest.save()
+        self.assertEqual(get_stats(self.user, start, self.end)["quests"][0]["name"], "Cook's Assistant II")
+
+
+class DashboardQueryTests(TestCase):
+    budget = 5
+
+    def setUp(self):
+        cache.clear()
+
+    def test_dashboard_stays_within_query_budget(self):
+        self.client.get(reverse("dashboard"))
+        with self.assertNumQueries(self.budget):
+            response = self.client.get(reverse("dashboard"))
+        self.assertEqual(response.status_code, 200)
+
+
+@override_settings(ROOT_URLCONF=AsyncURLConf)
+class AsyncDashboardTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_middleware_stays_async(self):
+        async def get_response(request):
+            return None
+
+        for middleware in (metrics.MetricsMiddleware, ReplicaPinMiddleware, ProfilerMiddleware):
+            with self.subTest(middleware=middleware.__name__):
+                self.assertTrue(iscoroutinefunction(middleware(get_response)))
+                self.assertFalse(iscoroutinefunction(middleware(lambda request: None)))
+
+    async def test_dashboard_renders_with_async_reads(self):
+        client = AsyncClient()
+        first = await client.get(reverse("dashboard"))
+        self.assertEqual(first.status_code, 200)
+        response = await client.get(reverse("dashboard"))
+        self.assertEqual(response.status_code, 200)
+        cached = await client.get(reverse("dashboard"), headers={"if-none-match": response["ETag"]})
+        self.assertEqual(cached.status_code, 304)
+
+    async def test_configured_middleware_runs_async(self):
+        calls = []
+        original = metrics.MetricsMiddleware.__acall__
+
+        async def spy(middleware, request):
+            calls.append(request.path)
+            return await original(middleware, request)
+
+        with mock.patch.object(metrics.MetricsMiddleware, "__acall__", spy):
+            await AsyncClient().get(reverse("dashboard"))
+        self.assertEqual(calls, [reverse("dashboard")])
+
+    async def test_async_dashboard_queries_are_recorded(self):
+        before = metrics._views.get("dashboard", metrics._empty_view())["queries"]
+        await AsyncClient().get(reverse("dashboard"))
+        self.assertGreater(metrics._views["dashboard"]["queries"], before)
+
+
+class ParallelReadTests(SimpleTestCase):
+    def test_gather_reads_run_at_the_same_time(self):
+        barrier = threading.Barrier(3, timeout=5)
+        self.assertEqual(sorted(async_to_sync(gather_reads)(*[(barrier.wait,)] * 3)), [0, 1, 2])
+
+
+@override_settings(ROOT_URLCONF=AsyncURLConf, TRACKER_ASYNC_PARALLEL_READS=True)
+class ParallelDashboardTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+
+    async def test_dashboard_renders_with_parallel_reads(self):
+        client = AsyncClient()
+        self.assertEqual((await client.get(reverse("dashboard"))).status_code, 200)
+        self.assertEqual((await client.get(reverse("dashboard"))).status_code, 200)
+
+
+class ExportMemoryTests(TestCase):
+    rows = 50000
+    peak_limit = 3 * 1024 * 1024
+
+    def setUp(self):
+        cache.clear()
+        self.client.get(reverse("dashboard"))
+        user = get_user_model().objects.get(username="default")
+        start = timezone.now() - timedelta(days=30)
+        Entry.objects.bulk_create(
+            [
+                Entry(
+                    user=user,
+                    timestamp=start + timedelta(minutes=index),
+                    kind=Entry.Kind.EARN,
+                    label=f"Export row {index}",
+                    category=Entry.Category.BASE,
+                    ap=5,
+                )
+                for index in range(self.rows)
+            ],
+            batch_size=2000,
+        )
+
+    def test_streamed_export_memory_is_bounded(self):
+        response = self.client.get(reverse("export_entries"), {"format": "csv"})
+        self.assertTrue(response.streaming)
+        tracemalloc.start()
+        try:
+            size = lines = 0
+            for chunk in response.streaming_content:
+                size += len(chunk)
+                lines += chunk.count(b"\n")
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertEqual(lines, self.rows + 1)
+        self.assertGreater(size, self.peak_limit)
+        self.assertLess(peak, self.peak_limit)
+
+
+class QueryBudgetTests(TransactionTestCase):
+    sizes = (100, 2000)
+
+    def test_bench_operations_stay_within_budgets(self):
+        for size in self.sizes:
+            with self.subTest(entries=size):
+                get_user_model().objects.all().delete()
+                cache.clear()
+                generate_dataset(users=2, entries=size, seed=size)
+                results = run_operations(get_default_user(), self.client, iterations=2)
+                self.assertEqual(check_budgets({str(size): results}), [])
+
+
+class QueryPlanTests(TestCase):
+    def test_service_queries_use_indexes(self):
+        generate_dataset(users=2, entries=500)
+        user = get_user_model().objects.get(username="default")
+        results = explain_queries(user)
+        self.assertIn("snapshot", {name.partition("#")[0] for name, _, _ in results})
+        for name, plan, scans in results:
+            with self.subTest(query=name):
+                self.assertEqual(scans, [], plan)
@@ -1,19 +1,53 @@
+from django.conf import settings
 from django.urls import path
 
-from . import views
+from . import api, async_api, async_views, views
 
-urlpatterns = [
-    path("", views.dashboard, name="dashboard"),
-    path("earn/<int:preset_id>/", views.earn_preset, name="earn_preset"),
-    path("spend/<int:cost>/", views.spend, name="spend"),
-    path("entries/undo-last-spend/", views.undo_spend, name="undo_spend"),
+
+def build_urlpatterns(async_enabled):
+    pages = async_views if async_enabled else views
+    actions = async_api if async_enabled else api
+    return [
+        path("", pages.dashboard, name="dashboard"),
+        path("earn/<int:preset_id>/", pages.earn_preset, name="earn_preset"),
+        path("spend/<int:cost>/", pages.spend, name="spend"),
+        path("entries/undo-last-spend/", pages.undo_spend, name="undo_spend"),
+        path("quests/set-active/<int:quest_id>/", pages.set_active, name="set_active"),
+        path("quests/complete/<int:quest_id>/", pages.complete_quest, name="complete_quest"),
+        path("api/earn/<int:preset_id>/", actions.earn_preset, name="api_earn_preset"),
+        path("api/spend/<int:cost>/", actions.spend, name="api_spend"),
+        path("api/entries/undo-last-spend/", actions.undo_spend, name="api_undo_spend"),
+        path("api/quests/set-active/<int:quest_id>/", actions.set_active, name="api_set_active"),
+        path("api/quests/complete/<int:quest_id>/", actions.complete_quest, name="api_complete_quest"),
+        path("api/sync/", actions.sync, name="api_sync"),
+        *shared_urlpatterns,
+    ]
+
+
+shared_urlpatterns = [
     path("quests/", views.quests, name="quests"),
-    path("quests/set-active/<int:quest_id>/", views.set_active, name="set_active"),
-    path("quests/complete/<int:quest_id>/", views.complete_quest, name="complete_quest"),
     path("quests/update-notes/<int:quest_id>/", views.update_notes, name="update_notes"),
     path("presets/", views.presets, name="presets"),
+    path("presets/bulk/", views.bulk_presets, name="bulk_presets"),
     path("presets/<int:preset_id>/toggle/", views.toggle_preset, name="toggle_preset"),
     path("presets/<int:preset_id>/delete/", views.delete_preset, name="delete_preset"),
     path("presets/<int:preset_id>/move-<str:direction>/", views.move_preset, name="move_preset"),
+    path("log/", views.activity_log, name="activity_log"),
+    path("log/export/", views.export_entries, name="export_entries"),
+    path("log/import/", views.import_entries, name="import_entries"),
+    path("stats/", views.stats, name="stats"),
+    path("reports/weekly/", views.weekly_report, name="weekly_report"),
     path("settings/", views.settings_view, name="settings"),
+    path("cache-stats/", views.cache_stats, name="cache_stats"),
+    path("metrics", views.metrics, name="metrics"),
+    path("profiles/", views.profiles, name="profiles"),
+    path("profiles/<str:capture_id>.<str:kind>", views.profile_download, name="profile_download"),
+    path("api/quests/search/", api.quest_search, name="api_quest_search"),
+    path("api/presets/order/", api.preset_order, name="api_preset_order"),
+    path("api/log/", api.log, name="api_log"),
+    path("api/stats/", api.stats, name="api_stats"),
+    path("sw.js", views.service_worker, name="service_worker"),
 ]
+
+
+urlpatterns = build_urlpatterns(settings.TRACKER_ASYNC_VIEWS)
@@ -1,27 +1,52 @@
+import hashlib
+import io
+from datetime import timedelta
+
+from django.conf import settings
 from django.contrib import messages
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth import get_user_model
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseForbidden, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.utils import timezone
-
-from .forms import PresetForm, QuestForm, SettingsForm
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+
+from .cache import get_active_presets, get_cached_user, get_user_settings
+from .exports import CONTENT_TYPES, export_rows, stream_export
+from .forms import ExportForm, ImportForm, LogFilterForm, PresetForm, QuestForm, SettingsForm, StatsForm, WeeklyReportForm
+from .imports import import_entries as import_entry_rows
+from .ledger import get_user_ledger
+from .metrics import collect, fragment_stats, render_prometheus, scrape_allowed
 from .models import EarnPreset, Entry, Quest
-from .signals import ensure_user_defaults
+from .profiling import capture_path, list_captures
+from .progress import PROGRESS_SETTINGS, get_progress, progress_summary
+from .reports import get_weekly_reports, week_start
 from .services import (
-    SPEND_COSTS,
-    balance,
+    PRESET_BULK_ACTIONS,
+    bulk_update_presets,
     earn_from_preset,
     get_active_quest,
+    get_log_page,
+    get_quest_progress,
+    get_spend_options,
     is_osrs_unlocked_today,
     is_saturday_locked_now,
     mark_quest_complete,
+    move_preset as move_preset_position,
+    recent_quests,
     set_active_quest,
     spend_ap,
-    today_totals,
+    take_snapshot,
     undo_last_spend,
+    week_totals,
 )
+from .signals import ensure_user_defaults
+from .stats import get_stats
+from .tasks import enqueue, queue_depth
 
 
-def get_default_user():
+def _load_default_user():
     User = get_user_model()
     user, created = User.objects.get_or_create(username="default")
     if created:
@@ -31,59 +56,219 @@ def get_default_user():
     return user
 
 
-def dashboard(request):
+def get_default_user():
+    user = get_cached_user("default", _load_default_user)
+    user.usersettings = get_user_settings(user)
+    return user
+
+
+def _ledger_etag(request, fields, extra=()):
+    if request.method not in ("GET", "HEAD") or len(messages.get_messages(request)):
+        return None
     user = get_default_user()
-    active_quest = get_active_quest(user)
-    presets = EarnPreset.objects.filter(user=user, is_active=True).order_by("sort_order", "label")
-    entries = Entry.objects.filter(user=user).select_related("quest")[:50]
-
-    totals = today_totals(user)
-    current_balance = balance(user)
-    unlocked_today = is_osrs_unlocked_today(user)
-    saturday_locked = is_saturday_locked_now(user)
-
-    quests = Quest.objects.filter(user=user)
-    total_quests = quests.count()
-    completed_quests = quests.filter(status=Quest.Status.COMPLETED).count()
-
-    spend_options = []
-    for cost, minutes in SPEND_COSTS.items():
-        enabled = True
-        reason = ""
-        if not active_quest:
-            enabled = False
-            reason = "Select an active quest"
-        elif saturday_locked:
-            enabled = False
-            unlock_time = user.usersettings.saturday_unlock_time.strftime("%H:%M")
-            reason = f"Locked until {unlock_time}"
-        elif not unlocked_today:
-            enabled = False
-            reason = "Net AP today below unlock"
-        elif current_balance < cost:
-            enabled = False
-            reason = "Insufficient balance"
-        spend_options.append({"cost": cost, "minutes": minutes, "enabled": enabled, "reason": reason})
-
-    context = {
+    ledger = get_user_ledger(user)
+    user.usersettings = get_user_settings(user, ledger.settings_version)
+    parts = [settings.TRACKER_ETAG_SALT or "v", user.pk]
+    parts += [getattr(ledger, f"{field}_version") for field in fields]
+    parts += list(extra(user) if callable(extra) else extra)
+    csrf_cookie = request.COOKIES.get(settings.CSRF_COOKIE_NAME, "")
+    parts.append(hashlib.sha256(csrf_cookie.encode()).hexdigest()[:16])
+    return "-".join(str(part) for part in parts)
+
+
+def dashboard_etag(request):
+    now = timezone.localtime()
+
+    def extra(user):
+        return now.date().isoformat(), int(is_saturday_locked_now(user, now=now))
+
+    return _ledger_etag(request, ("entry", "quest", "preset", "settings"), extra)
+
+
+def quests_etag(request):
+    return _ledger_etag(request, ("quest",))
+
+
+def presets_etag(request):
+    return _ledger_etag(request, ("preset",))
+
+
+def log_etag(request):
+    return _ledger_etag(request, ("entry", "quest"), (request.GET.urlencode(),))
+
+
+def stats_etag(request):
+    extra = (timezone.localdate().isoformat(), request.GET.urlencode())
+    return _ledger_etag(request, ("entry", "history"), extra)
+
+
+def settings_etag(request):
+    return _ledger_etag(request, ("settings",))
+
+
+def recent_entries(user):
+    return Entry.objects.filter(user=user).select_related("quest")[:50]
+
+
+def dashboard_context(user, active_quest, presets, snapshot, quests, progress, streaks):
+    totals = snapshot.today
+    unlocked_today = is_osrs_unlocked_today(user, snapshot=snapshot)
+    saturday_locked = is_saturday_locked_now(user, snapshot=snapshot)
+    completed_quests, total_quests = progress
+    return {
         "active_quest": active_quest,
         "presets": presets,
-        "entries": entries,
+        "entries": recent_entries(user),
         "today_earned": totals["earned"],
         "today_spent": totals["spent"],
         "today_net": totals["net"],
-        "balance": current_balance,
+        "balance": snapshot.balance,
         "unlocked_today": unlocked_today and not saturday_locked,
         "saturday_locked": saturday_locked,
         "quests": quests,
         "total_quests": total_quests,
         "completed_quests": completed_quests,
-        "spend_options": spend_options,
-        "now": timezone.localtime(),
+        "streaks": progress_summary(streaks, snapshot),
+        "spend_options": get_spend_options(snapshot, active_quest),
+        "now": snapshot.now,
+        "versions": snapshot.versions,
+        "cache_user_id": user.pk,
     }
+
+
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=dashboard_etag)
+def dashboard(request):
+    user = get_default_user()
+    context = dashboard_context(
+        user,
+        get_active_quest(user),
+        get_active_presets(user),
+        take_snapshot(user),
+        recent_quests(user),
+        get_quest_progress(user),
+        get_progress(user),
+    )
     return render(request, "tracker/dashboard.html", context)
 
 
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=log_etag)
+def activity_log(request):
+    user = get_default_user()
+    form = LogFilterForm(user, request.GET)
+    entries, next_cursor = [], None
+    try:
+        entries, next_cursor = get_log_page(user, **form.filters())
+    except ValueError as exc:
+        messages.error(request, str(exc))
+    next_query = None
+    if next_cursor:
+        params = request.GET.copy()
+        params["cursor"] = next_cursor
+        next_query = params.urlencode()
+    context = {"form": form, "entries": entries, "next_query": next_query}
+    context.update(export_form=ExportForm(), import_form=ImportForm())
+    return render(request, "tracker/log.html", context)
+
+
+def export_entries(request):
+    form = ExportForm(request.GET)
+    if not form.is_valid():
+        messages.error(request, "Invalid export options.")
+        return redirect("activity_log")
+    data = form.cleaned_data
+    rows = export_rows(get_default_user(), start=data["start"], end=data["end"], kind=data["kind"] or None)
+    export_format = data["format"]
+    response = StreamingHttpResponse(stream_export(rows, export_format), content_type=CONTENT_TYPES[export_format])
+    filename = f"ap-entries-{timezone.localdate():%Y%m%d}.{export_format}"
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+def import_entries(request):
+    if request.method != "POST":
+        return redirect("activity_log")
+    form = ImportForm(request.POST, request.FILES)
+    if not form.is_valid():
+        messages.error(request, "Choose a CSV file to import.")
+        return redirect("activity_log")
+    lines = io.TextIOWrapper(form.cleaned_data["file"], encoding="utf-8-sig", newline="")
+    try:
+        result = import_entry_rows(get_default_user(), lines, skip_invalid=form.cleaned_data["skip_invalid"])
+    except (ValueError, UnicodeDecodeError) as exc:
+        messages.error(request, str(exc))
+        return redirect("activity_log")
+    messages.success(
+        request,
+        f"Imported {result.created} of {result.rows} rows ({result.rows_per_second:.0f} rows/s, "
+        f"{result.quests_created} new quests, {len(result.errors)} skipped).",
+    )
+    return redirect("activity_log")
+
+
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=stats_etag)
+def stats(request):
+    user = get_default_user()
+    form = StatsForm(request.GET)
+    try:
+        report = get_stats(user, **form.stats_range())
+    except ValueError as exc:
+        messages.error(request, str(exc))
+        return redirect("stats")
+    peak = max((max(row["earned"], row["spent"]) for row in report["series"]), default=0)
+    context = {"form": form, "report": report, "peak": peak or 1, "week": week_totals(user)}
+    return render(request, "tracker/stats.html", context)
+
+
+@staff_member_required
+def weekly_report(request):
+    form = WeeklyReportForm(request.GET)
+    try:
+        week = week_start(form.report_week())
+        reports = get_weekly_reports(week)
+    except ValueError as exc:
+        messages.error(request, str(exc))
+        return redirect("weekly_report")
+    totals = {field: sum(getattr(report, field) for report in reports) for field in ("earned", "spent", "net", "minutes")}
+    context = {"form": form, "week": week, "week_end": week + timedelta(days=6), "reports": reports, "totals": totals}
+    return render(request, "tracker/weekly_report.html", context)
+
+
+def service_worker(request):
+    response = render(request, "tracker/sw.js", content_type="application/javascript")
+    response["Service-Worker-Allowed"] = "/"
+    return response
+
+
+def cache_stats(request):
+    if not scrape_allowed(request):
+        return HttpResponseForbidden()
+    _, fragments, _ = collect()
+    return JsonResponse({"fragments": fragment_stats(fragments)})
+
+
+def metrics(request):
+    if not scrape_allowed(request):
+        return HttpResponseForbidden()
+    return HttpResponse(render_prometheus(*collect(), queue=queue_depth()), content_type="text/plain; version=0.0.4")
+
+
+@staff_member_required
+def profiles(request):
+    return render(request, "tracker/profiles.html", {"captures": list_captures()})
+
+
+@staff_member_required
+def profile_download(request, capture_id, kind):
+    try:
+        path = capture_path(capture_id, ".prof" if kind == "prof" else ".json")
+    except ValueError as exc:
+        raise Http404(str(exc))
+    return FileResponse(path.open("rb"), as_attachment=True, filename=path.name)
+
+
 def earn_preset(request, preset_id):
     if request.method != "POST":
         return redirect("dashboard")
@@ -117,6 +302,8 @@ def undo_spend(request):
     return redirect("dashboard")
 
 
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=quests_etag)
 def quests(request):
     user = get_default_user()
     quests_qs = Quest.objects.filter(user=user).order_by("name")
@@ -168,6 +355,8 @@ def update_notes(request, quest_id):
     return redirect("dashboard")
 
 
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=presets_etag)
 def presets(request):
     user = get_default_user()
     presets_qs = EarnPreset.objects.filter(user=user).order_by("sort_order", "label")
@@ -206,27 +395,39 @@ def delete_preset(request, preset_id):
 def move_preset(request, preset_id, direction):
     if request.method != "POST":
         return redirect("presets")
-    user = get_default_user()
-    preset = get_object_or_404(EarnPreset, user=user, id=preset_id)
-    offset = -1 if direction == "up" else 1
-    swap = (
-        EarnPreset.objects.filter(user=user, sort_order=preset.sort_order + offset)
-        .order_by("sort_order")
-        .first()
-    )
-    if swap:
-        preset.sort_order, swap.sort_order = swap.sort_order, preset.sort_order
-        preset.save(update_fields=["sort_order", "updated_at"])
-        swap.save(update_fields=["sort_order", "updated_at"])
+    try:
+        move_preset_position(get_default_user(), preset_id, direction)
+    except ValueError as exc:
+        messages.error(request, str(exc))
+    return redirect("presets")
+
+
+def bulk_presets(request):
+    if request.method != "POST":
+        return redirect("presets")
+    action = request.POST.get("action")
+    preset_ids = request.POST.getlist("preset_ids")
+    if action not in PRESET_BULK_ACTIONS or not preset_ids:
+        messages.error(request, "Select presets and an action.")
+        return redirect("presets")
+    try:
+        count = bulk_update_presets(get_default_user(), preset_ids, action)
+        messages.success(request, f"{count} preset(s) updated.")
+    except ValueError as exc:
+        messages.error(request, str(exc))
     return redirect("presets")
 
 
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=settings_etag)
 def settings_view(request):
     settings_obj = get_default_user().usersettings
     if request.method == "POST":
         form = SettingsForm(request.POST, instance=settings_obj)
         if form.is_valid():
             form.save()
+            if PROGRESS_SETTINGS.intersection(form.changed_data):
+                enqueue("tracker.settings_saved", unique=True, user_id=settings_obj.user_id)
             messages.success(request, "Settings updated.")
             return redirect("settings")
     else: